@@ -1,58 +1,86 @@
 from flask import Flask
 from flask_cors import CORS
-from flask_sqlalchemy import SQLAlchemy
-from flask_bcrypt import Bcrypt
-from flask_jwt_extended import JWTManager
+from extensions import db, bcrypt, jwt, cache
 from datetime import timedelta
+from sqlalchemy import event
 import os
 
-# Initialize extensions
-db = SQLAlchemy()
-bcrypt = Bcrypt()
-jwt = JWTManager()
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Per-connection SQLite settings: WAL lets readers run during a write"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA busy_timeout=5000')
+    cursor.close()
+
 
 def create_app(config_name='development'):
+    from utils.logging_setup import configure_logging
+    configure_logging()
+
     app = Flask(__name__)
+
+    from utils.json_provider import OrjsonProvider
+    app.json = OrjsonProvider(app)
+    
+    from config import config, DATABASE_URL
+    app.config.from_object(config[config_name])
     
-    # Handle Render PostgreSQL database URL
-    database_url = os.environ.get('DATABASE_URL')
-    if database_url:
-        # Fix for Render's PostgreSQL URL format
-        if database_url.startswith('postgres://'):
-            database_url = database_url.replace('postgres://', 'postgresql://', 1)
-        app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    # DATABASE_URL (e.g. Render PostgreSQL) overrides the configured database
+    if DATABASE_URL:
+        app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
         print("✅ Using PostgreSQL database from DATABASE_URL")
     else:
-        # Fallback for local development
-        from config import config
-        app.config.from_object(config[config_name])
         print(f"✅ Using database from config: {config_name}")
+
+    # Compiled-statement cache: room for every distinct query shape the
+    # routes build (filter combinations multiply them), so none recompile
+    engine_options = {
+        'query_cache_size': int(os.environ.get('SQLALCHEMY_QUERY_CACHE_SIZE', 1200))
+    }
     
-    # Load other configuration from config.py
-    from config import config
-    if not database_url:  # Only use config file if no DATABASE_URL
-        app.config.from_object(config[config_name])
-    
-    # Set other essential configs
-    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', app.config.get('SECRET_KEY', 'fallback-secret'))
-    app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', app.config.get('JWT_SECRET_KEY', 'fallback-jwt-secret'))
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    
-    # Initialize CORS
+    # Connection pool tuning (SQLite manages its own pool, so skip it there)
+    is_sqlite = (app.config.get('SQLALCHEMY_DATABASE_URI') or '').startswith('sqlite')
+    if not is_sqlite:
+        engine_options.update({
+            'pool_size': int(os.environ.get('SQLALCHEMY_POOL_SIZE', 10)),
+            'max_overflow': int(os.environ.get('SQLALCHEMY_MAX_OVERFLOW', 20)),
+            'pool_timeout': int(os.environ.get('SQLALCHEMY_POOL_TIMEOUT', 30)),
+            'pool_recycle': int(os.environ.get('SQLALCHEMY_POOL_RECYCLE', 1800)),
+            'pool_pre_ping': True
+        })
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options
+
+    # Response cache: Redis when REDIS_URL is set, otherwise in-process
+    redis_url = os.environ.get('REDIS_URL')
+    if redis_url:
+        app.config['CACHE_TYPE'] = 'RedisCache'
+        app.config['CACHE_REDIS_URL'] = redis_url
+    else:
+        app.config['CACHE_TYPE'] = 'SimpleCache'
+    app.config['CACHE_DEFAULT_TIMEOUT'] = 30
+
+    # Initialize CORS (flask-cors writes the Access-Control-* headers itself;
+    # a single precompiled pattern keeps the origin check O(1) in list size)
     CORS(app, 
          resources={r"/api/*": {
-             "origins": os.environ.get('CORS_ORIGINS', 'http://localhost:5173').split(','),
+             "origins": app.config['CORS_ORIGIN_PATTERN'],
              "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
              "allow_headers": ["Content-Type", "Authorization"],
              "expose_headers": ["Content-Type", "Authorization"],
              "supports_credentials": True,
-             "max_age": 3600
+             "max_age": 86400
          }})
     
     # Initialize extensions
     db.init_app(app)
+    if is_sqlite:
+        with app.app_context():
+            event.listen(db.engine, 'connect', _set_sqlite_pragmas)
     bcrypt.init_app(app)
     jwt.init_app(app)
+    cache.init_app(app)
     
     # Register blueprints (your existing code)
     from routes import (
@@ -84,15 +112,12 @@ def create_app(config_name='development'):
         db.session.rollback()
         return {'error': 'Internal server error'}, 500
     
-    # Create tables
-    with app.app_context():
-        try:
-            db.create_all()
-            from utils.seed import create_default_admin
-            create_default_admin()
-            print("✅ Database tables created successfully")
-        except Exception as e:
-            print(f"❌ Database error: {str(e)}")
-            # Don't raise error, just log it
+    # Create tables and seed the admin once per deploy
+    # (`PYTHONPATH=. flask --app run init-db`), not in every worker at boot
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create database tables and the default admin user"""
+        from utils.seed import init_db
+        init_db()
     
     return app
\ No newline at end of file
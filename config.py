@@ -2,12 +2,36 @@
 Application configuration
 """
 import os
+import re
 from datetime import timedelta
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
+def _resolve_database_url():
+    """Read DATABASE_URL, fixing Render's postgres:// scheme for SQLAlchemy"""
+    url = os.environ.get('DATABASE_URL')
+    if url and url.startswith('postgres://'):
+        url = url.replace('postgres://', 'postgresql://', 1)
+    return url
+
+
+def _compile_origins(origins):
+    """
+    Compile allowed origins into one anchored, case-insensitive pattern
+    
+    '*' matches a single host label, so 'https://f-pass-repo3-*.vercel.app'
+    allows every preview deploy.
+    """
+    alternatives = (re.escape(origin).replace(r'\*', r'[a-z0-9-]+') for origin in origins)
+    return re.compile(r'^(?:' + '|'.join(alternatives) + r')\Z', re.IGNORECASE)
+
+
+# Resolved once at import time so create_app only has to assign it
+DATABASE_URL = _resolve_database_url()
+
+
 class Config:
     """Base configuration"""
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -15,9 +39,15 @@ class Config:
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-key-change-in-production')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+    BCRYPT_LOG_ROUNDS = 12
     
-    # CORS Configu`ration
-    CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:5173').split(',')
+    # CORS Configuration (trimmed, de-duplicated)
+    CORS_ORIGINS = list(dict.fromkeys(
+        origin.strip()
+        for origin in os.environ.get('CORS_ORIGINS', 'http://localhost:5173').split(',')
+        if origin.strip()
+    ))
+    CORS_ORIGIN_PATTERN = _compile_origins(CORS_ORIGINS)
     
     # Transaction Configuration
     TRANSACTION_FEE_RATE = 0.015  # 1.5%
@@ -31,14 +61,14 @@ class Config:
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///money_transfer.db')
+    SQLALCHEMY_DATABASE_URI = DATABASE_URL or 'sqlite:///money_transfer.db'
     SQLALCHEMY_ECHO = False
 
 
 class ProductionConfig(Config):
     """Production configuration"""
     DEBUG = False
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
+    SQLALCHEMY_DATABASE_URI = DATABASE_URL
     SQLALCHEMY_ECHO = False
     
     # Security
@@ -50,6 +80,7 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
+    BCRYPT_LOG_ROUNDS = 4  # bcrypt cost is exponential in rounds
     SQLALCHEMY_DATABASE_URI = 'sqlite:///test_money_transfer.db'
     WTF_CSRF_ENABLED = False
 
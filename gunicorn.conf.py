@@ -0,0 +1,16 @@
+"""
+Gunicorn settings (picked up automatically from the working directory)
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# Handlers spend most of their time waiting on the database or writing
+# PDFs, so each worker runs several threads to overlap that I/O.
+# Each process has its own SQLAlchemy pool; keep threads <= pool_size + max_overflow.
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 4)))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+keepalive = 5
@@ -1,4 +1,4 @@
-from __init__ import db
+from extensions import db
 from datetime import datetime
 
 class Beneficiary(db.Model):
@@ -10,7 +10,7 @@ class Beneficiary(db.Model):
     email = db.Column(db.String(120), nullable=False)
     wallet_id = db.Column(db.String(50), nullable=False)
     relationship = db.Column(db.String(100))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now())
     
     def to_dict(self):
         """Convert beneficiary to dictionary"""
@@ -21,7 +21,7 @@ class Beneficiary(db.Model):
             'email': self.email,
             "wallet_id": self.wallet_id,
             'relationship': self.relationship,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
     
     def __repr__(self):
@@ -1,26 +1,42 @@
 """
 Notification model for storing user notifications
 """
-from __init__ import db
+from extensions import db
+from models.user import User
 from datetime import datetime
+from sqlalchemy import select, func
+from sqlalchemy.orm import column_property
+from sqlalchemy.dialects.postgresql import JSONB
+from utils.cache_helpers import invalidate_unread_count
 
 
 class Notification(db.Model):
     __tablename__ = 'notifications'
+    __table_args__ = (
+        # Unread feed and counts: WHERE user_id = ? AND is_read = false ORDER BY created_at DESC
+        db.Index('ix_notif_user_unread_created', 'user_id', 'is_read', 'created_at'),
+        # Full feed: WHERE user_id = ? ORDER BY created_at DESC LIMIT n, no sort step
+        db.Index('ix_notif_user_created', 'user_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    # Indexed through the composites above (user_id leads both)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
     message = db.Column(db.Text, nullable=False)
     type = db.Column(db.String(50), default='info')  # info, success, warning, error, transaction
-    is_read = db.Column(db.Boolean, default=False, index=True)
+    is_read = db.Column(db.Boolean, default=False)
     link = db.Column(db.String(500))  # Optional link to related resource
-    meta_data = db.Column(db.JSON)  # Additional data (transaction_id, amount, etc.) - renamed from metadata
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    meta_data = db.Column(db.JSON().with_variant(JSONB(), 'postgresql'))  # Additional data (transaction_id, amount, etc.) - renamed from metadata
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now(), index=True)
     read_at = db.Column(db.DateTime)
     
-    # Relationship
-    user = db.relationship('User', backref=db.backref('notifications', lazy='dynamic'))
+    # Relationship (raise on lazy load; use joinedload(Notification.user) when needed)
+    user = db.relationship(
+        'User',
+        backref=db.backref('notifications', order_by='Notification.created_at.desc()'),
+        lazy='raise'
+    )
     
     def to_dict(self):
         """Convert notification to dictionary"""
@@ -32,9 +48,9 @@ class Notification(db.Model):
             'type': self.type,
             'is_read': self.is_read,
             'link': self.link,
-            'metadata': self.metadata,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'read_at': self.read_at.isoformat() if self.read_at else None
+            'metadata': self.meta_data,
+            'created_at': self.created_at,
+            'read_at': self.read_at
         }
     
     def mark_as_read(self):
@@ -43,12 +59,31 @@ class Notification(db.Model):
             self.is_read = True
             self.read_at = datetime.utcnow()
             db.session.commit()
+            invalidate_unread_count(self.user_id)
     
     def __repr__(self):
         return f'<Notification {self.id} - {self.title}>'
 
 
-def create_notification(user_id, title, message, notification_type='info', link=None, metadata=None):
+# Unread count as a deferred SQL subquery on User; load it for a whole list
+# with .options(undefer(User.unread_notification_count))
+User.unread_notification_count = column_property(
+    select(func.count(Notification.id))
+    .where(Notification.user_id == User.id, Notification.is_read == False)
+    .correlate_except(Notification)
+    .scalar_subquery(),
+    deferred=True
+)
+
+
+# Transaction notification templates
+_SENT_TITLE = "Money Sent Successfully"
+_SENT_MESSAGE = "You successfully sent $%.2f"
+_RECEIVED_TITLE = "Money Received"
+_RECEIVED_MESSAGE = "You received $%.2f"
+
+
+def create_notification(user_id, title, message, notification_type='info', link=None, meta_data=None):
     """
     Helper function to create a notification
     
@@ -58,7 +93,7 @@ def create_notification(user_id, title, message, notification_type='info', link=
         message: Notification message
         notification_type: Type of notification
         link: Optional link to related resource
-        metadata: Optional additional data
+        meta_data: Optional additional data
     
     Returns:
         Notification: Created notification object
@@ -69,15 +104,40 @@ def create_notification(user_id, title, message, notification_type='info', link=
         message=message,
         type=notification_type,
         link=link,
-        metadata=metadata
+        meta_data=meta_data
     )
     
     db.session.add(notification)
     db.session.commit()
+    invalidate_unread_count(user_id)
     
     return notification
 
 
+def create_notifications_bulk(items, commit=True):
+    """
+    Create several notifications with a single commit
+    
+    Args:
+        items: List of dicts of Notification column values
+            (user_id, title, message, type, link, meta_data)
+        commit: Commit and drop the users' cached unread counts. Pass False
+            to join the caller's transaction; the caller then commits and
+            calls invalidate_unread_count itself.
+    
+    Returns:
+        list: Created notification objects
+    """
+    notifications = [Notification(**item) for item in items]
+    
+    db.session.add_all(notifications)
+    if commit:
+        db.session.commit()
+        invalidate_unread_count(*{item['user_id'] for item in items})
+    
+    return notifications
+
+
 def create_transaction_notification(transaction, user_id, is_sender=False):
     """
     Create a notification for a transaction
@@ -91,13 +151,13 @@ def create_transaction_notification(transaction, user_id, is_sender=False):
         Notification: Created notification object
     """
     if is_sender:
-        title = "Money Sent Successfully"
-        message = f"You successfully sent ${transaction.amount:.2f}"
+        title = _SENT_TITLE
+        message = _SENT_MESSAGE % transaction.amount
     else:
-        title = "Money Received"
-        message = f"You received ${transaction.amount:.2f}"
+        title = _RECEIVED_TITLE
+        message = _RECEIVED_MESSAGE % transaction.amount
     
-    metadata = {
+    meta_data = {
         'transaction_id': transaction.transaction_id,
         'amount': float(transaction.amount),
         'type': transaction.type,
@@ -110,5 +170,5 @@ def create_transaction_notification(transaction, user_id, is_sender=False):
         message=message,
         notification_type='transaction',
         link=f'/user/transactions/{transaction.transaction_id}',
-        metadata=metadata
+        meta_data=meta_data
     )
\ No newline at end of file
@@ -1,24 +1,50 @@
-from __init__ import db
+from extensions import db
+from sqlalchemy.orm import joinedload
 from datetime import datetime
 
 class Transaction(db.Model):
     __tablename__ = 'transactions'
+    __table_args__ = (
+        # History: WHERE sender_id = ? OR receiver_id = ? ORDER BY created_at DESC, id DESC,
+        # with the keyset cursor (created_at, id) < (?, ?) as a range on the same index
+        db.Index('ix_tx_sender_created_id', 'sender_id', 'created_at', 'id', postgresql_include=['amount', 'status']),
+        db.Index('ix_tx_receiver_created_id', 'receiver_id', 'created_at', 'id', postgresql_include=['amount', 'status']),
+        # Admin list keyset pagination: ORDER BY created_at DESC, id DESC
+        db.Index('ix_tx_created_id', 'created_at', 'id'),
+        # Per-user transfer counts/totals: WHERE sender_id|receiver_id = ? AND type = ? AND status = ?
+        db.Index(
+            'ix_tx_sender_type_status', 'sender_id', 'type', 'status',
+            postgresql_include=['amount', 'total_amount', 'fee', 'created_at']
+        ),
+        db.Index(
+            'ix_tx_receiver_type_status', 'receiver_id', 'type', 'status',
+            postgresql_include=['amount', 'total_amount', 'fee', 'created_at']
+        ),
+        # Dashboard/stats aggregates over completed transactions by date
+        db.Index(
+            'ix_tx_completed_created', 'created_at', 'type',
+            postgresql_where=db.text("status = 'completed'"),
+            sqlite_where=db.text("status = 'completed'")
+        ),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     transaction_id = db.Column(db.String(50), unique=True, nullable=False, index=True)
     sender_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     receiver_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
-    amount = db.Column(db.Float, nullable=False)
-    fee = db.Column(db.Float, default=0.0)
-    total_amount = db.Column(db.Float, nullable=False)
+    amount = db.Column(db.Numeric(12, 2), nullable=False)
+    fee = db.Column(db.Numeric(12, 2), default=0)
+    total_amount = db.Column(db.Numeric(12, 2), nullable=False)
     type = db.Column(db.String(50), default='transfer')  # 'transfer', 'pesapay_deposit', 'add_funds'
     status = db.Column(db.String(20), default='completed')  # 'completed', 'pending', 'failed'
     note = db.Column(db.Text)
     merchant_request_id = db.Column(db.String(100), index=True)  # For matching callbacks
     checkout_request_id = db.Column(db.String(100), index=True)  # M-Pesa checkout ID
     mpesa_receipt_number = db.Column(db.String(50))  # M-Pesa receipt number
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Add this line
+    # Naive UTC from Python, the same clock every writer and date filter uses;
+    # server_default only covers rows inserted with raw SQL
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now(), index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now(), onupdate=datetime.utcnow)
     
     def to_dict(self):
         """Convert transaction to dictionary"""
@@ -27,18 +53,53 @@ class Transaction(db.Model):
             'transaction_id': self.transaction_id,
             'sender_id': self.sender_id,
             'receiver_id': self.receiver_id,
-            'amount': round(self.amount, 2),
-            'fee': round(self.fee, 2),
-            'total_amount': round(self.total_amount, 2),
+            'amount': self.amount,
+            'fee': self.fee,
+            'total_amount': self.total_amount,
             'type': self.type,
             'status': self.status,
             'note': self.note,
             'merchant_request_id': self.merchant_request_id,
             'checkout_request_id': self.checkout_request_id,
             'mpesa_receipt_number': self.mpesa_receipt_number,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
     
     def __repr__(self):
-        return f'<Transaction {self.transaction_id} - {self.amount}>'
\ No newline at end of file
+        return f'<Transaction {self.transaction_id} - {self.amount}>'
+
+
+# Admin free-text search target (matched with ILIKE '%term%'); on PostgreSQL
+# a trigram GIN index over the same expression keeps it off a sequential scan
+search_text = (
+    Transaction.transaction_id + db.literal_column("' '")
+    + db.func.coalesce(Transaction.note, db.literal_column("''"))
+).label('search_text')
+
+db.Index(
+    'ix_tx_search_trgm', search_text,
+    postgresql_using='gin',
+    postgresql_ops={'search_text': 'gin_trgm_ops'}
+).ddl_if(dialect='postgresql')
+
+
+# Columns returned by list endpoints, read as Core rows instead of ORM objects;
+# dict(row) serializes the same as Transaction.to_dict
+LIST_COLUMNS = tuple(Transaction.__table__.c)
+
+
+def get_with_parties(transaction_id):
+    """
+    Fetch a transaction by its public ID with sender and receiver joined in
+
+    Args:
+        transaction_id (str): Public transaction ID (e.g. 'TXN-...')
+
+    Returns:
+        Transaction or None: One SELECT, no lazy loads for the parties
+    """
+    return Transaction.query.options(
+        joinedload(Transaction.sender),
+        joinedload(Transaction.receiver)
+    ).filter_by(transaction_id=transaction_id).first()
@@ -1,8 +1,14 @@
-from __init__ import db, bcrypt
+from extensions import db, bcrypt
 from datetime import datetime
 
 class User(db.Model):
     __tablename__ = 'users'
+    __table_args__ = (
+        # Admin list keyset pagination: ORDER BY created_at DESC, id DESC
+        db.Index('ix_users_created_id', 'created_at', 'id'),
+        # Status-filtered admin lists and counts
+        db.Index('ix_users_status_created', 'status', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     first_name = db.Column(db.String(100), nullable=False)
@@ -17,7 +23,7 @@ class User(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
-    wallet = db.relationship('Wallet', backref='user', uselist=False, cascade='all, delete-orphan')
+    wallet = db.relationship('Wallet', back_populates='user', uselist=False, cascade='all, delete-orphan')
     sent_transactions = db.relationship('Transaction', foreign_keys='Transaction.sender_id', backref='sender', lazy='dynamic')
     received_transactions = db.relationship('Transaction', foreign_keys='Transaction.receiver_id', backref='receiver', lazy='dynamic')
     beneficiaries = db.relationship('Beneficiary', backref='user', lazy='dynamic', cascade='all, delete-orphan')
@@ -41,9 +47,30 @@ class User(db.Model):
             'country': self.country,
             'role': self.role,
             'status': self.status,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
     
     def __repr__(self):
-        return f'<User {self.email}>'
\ No newline at end of file
+        return f'<User {self.email}>'
+
+
+# Admin free-text search target (matched with ILIKE '%term%'); on PostgreSQL
+# a trigram GIN index over the same expression keeps it off a sequential scan
+search_text = (
+    User.first_name + db.literal_column("' '") + User.last_name + db.literal_column("' '") + User.email
+).label('search_text')
+
+db.Index(
+    'ix_users_search_trgm', search_text,
+    postgresql_using='gin',
+    postgresql_ops={'search_text': 'gin_trgm_ops'}
+).ddl_if(dialect='postgresql')
+
+
+# Columns returned by User.to_dict, for list endpoints that read plain rows
+# (never the password hash or address fields)
+LIST_COLUMNS = (
+    User.id, User.first_name, User.last_name, User.email, User.phone, User.country,
+    User.role, User.status, User.created_at, User.updated_at
+)
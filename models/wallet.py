@@ -1,29 +1,48 @@
-from __init__ import db
+from extensions import db
 from datetime import datetime
 
 class Wallet(db.Model):
     __tablename__ = 'wallets'
+    __table_args__ = (
+        # Admin list keyset pagination: ORDER BY created_at DESC, id DESC
+        db.Index('ix_wallets_created_id', 'created_at', 'id'),
+        # Admin search: wallet_id ILIKE '%term%' (trigram GIN, PostgreSQL only)
+        db.Index(
+            'ix_wallets_wallet_id_trgm', 'wallet_id',
+            postgresql_using='gin',
+            postgresql_ops={'wallet_id': 'gin_trgm_ops'}
+        ).ddl_if(dialect='postgresql'),
+        # Active wallet counts
+        db.Index(
+            'ix_wallets_active', 'status',
+            postgresql_where=db.text("status = 'active'"),
+            sqlite_where=db.text("status = 'active'")
+        ),
+        db.CheckConstraint('balance >= 0', name='ck_wallets_balance_non_negative'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, unique=True, index=True)
     wallet_id = db.Column(db.String(50), unique=True, nullable=False, index=True)
-    balance = db.Column(db.Float, default=0.0, nullable=False)
+    balance = db.Column(db.Numeric(14, 2), default=0, nullable=False)
     currency = db.Column(db.String(10), default='USD')
     status = db.Column(db.String(20), default='active')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    user = db.relationship('User', back_populates='wallet')
+    
     def to_dict(self):
         """Convert wallet to dictionary"""
         return {
             'id': self.id,
             'user_id': self.user_id,
             'wallet_id': self.wallet_id,
-            'balance': round(self.balance, 2),
+            'balance': self.balance,
             'currency': self.currency,
             'status': self.status,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
     
     def __repr__(self):
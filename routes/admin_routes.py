@@ -2,15 +2,131 @@
 Updated Admin Routes with Real Database Data
 Replace your existing routes/admin_routes.py with this file
 """
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from __init__ import db
+from flask import Blueprint, Response, request, jsonify, g, current_app, stream_with_context
+import hashlib
+import logging
+from extensions import db
 from models import User, Wallet, Transaction
+from models.user import search_text as user_search_text, LIST_COLUMNS as USER_LIST_COLUMNS
+from models.transaction import search_text as transaction_search_text
 from utils.decorators import admin_required, active_user_required
+from utils.helpers import ValidationError, encode_cursor, decode_cursor, to_money
+from utils.cache_helpers import (
+    get_or_set, WALLET_OVERVIEW_KEY, STATS_PERIODS, admin_stats_key,
+    invalidate_wallet, invalidate_user_directory, invalidate_admin_stats
+)
+from utils.params import qp_int, qp_limit, qp_date
 from datetime import datetime, timedelta
-from sqlalchemy import func, and_, or_
+from sqlalchemy import select, insert, update, func, and_, or_, tuple_
+from sqlalchemy.orm import contains_eager, joinedload
 
 bp = Blueprint('admin', __name__, url_prefix='/api/admin')
+logger = logging.getLogger(__name__)
+
+
+def _paginate(query, model, limit, offset, cursor):
+    """
+    Fetch one page ordered newest first
+    
+    With a cursor (the previous page's next_cursor) the page is selected by
+    keyset, WHERE (created_at, id) < cursor, so deep pages cost the same as
+    the first; otherwise the legacy offset is applied.
+    
+    Returns:
+        tuple: (rows, next_cursor)
+    """
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        query = query.filter(tuple_(model.created_at, model.id) < (cursor_created_at, cursor_id))
+    else:
+        query = query.offset(offset)
+    
+    rows = query.limit(limit).all()
+    next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id) if rows and len(rows) == limit else None
+    return rows, next_cursor
+
+
+def _total_count(name, query):
+    """
+    Exact row count for a filtered list, only when ?include_total=1
+    
+    COUNT(*) is the slowest part of a large list request, so it is opt-in and
+    cached briefly per endpoint and filter set.
+    
+    Returns:
+        int or None: Matching row count, or None if not requested
+    """
+    if request.args.get('include_total') != '1':
+        return None
+    
+    filters = sorted(
+        (key, value) for key, value in request.args.items()
+        if key not in ('limit', 'offset', 'cursor', 'include_total')
+    )
+    digest = hashlib.blake2b(repr(filters).encode(), digest_size=16).hexdigest()
+    return get_or_set(f"admin:count:{name}:{digest}", query.count, policy='normal')
+
+
+def _with_parties(query):
+    """Eager-load sender and receiver (names and email only) in the same SELECT"""
+    return query.options(
+        joinedload(Transaction.sender).load_only(User.first_name, User.last_name, User.email),
+        joinedload(Transaction.receiver).load_only(User.first_name, User.last_name, User.email)
+    )
+
+
+def _transaction_with_parties(t):
+    """Transaction dict plus sender/receiver name and email"""
+    t_data = t.to_dict()
+    sender = t.sender
+    receiver = t.receiver
+    
+    t_data['sender_name'] = f"{sender.first_name} {sender.last_name}" if sender else None
+    t_data['sender_email'] = sender.email if sender else None
+    t_data['receiver_name'] = f"{receiver.first_name} {receiver.last_name}" if receiver else None
+    t_data['receiver_email'] = receiver.email if receiver else None
+    return t_data
+
+
+def _stream_transactions(query, batch_size=500):
+    """
+    Stream every matching transaction as NDJSON, one object per line
+    
+    Rows come from a server-side cursor in batches of batch_size, so memory
+    stays flat however large the export is.
+    
+    Returns:
+        Response: application/x-ndjson streaming response
+    """
+    query = _with_parties(query).order_by(Transaction.created_at.desc(), Transaction.id.desc())
+    
+    def generate():
+        rows = query.execution_options(stream_results=True).yield_per(batch_size)
+        for t in rows:
+            yield current_app.json.dumps_line(_transaction_with_parties(t))
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+def _wallet_overview():
+    """
+    Wallet aggregates, cached for the normal policy
+    
+    Returns:
+        tuple: (total_balance, wallet_count, active_wallets)
+    """
+    def load():
+        total_balance, wallet_count, active_wallets = db.session.query(
+            func.sum(Wallet.balance),
+            func.count(Wallet.id),
+            func.count(Wallet.id).filter(Wallet.status == 'active')
+        ).one()
+        return total_balance or 0, wallet_count, active_wallets
+    
+    return get_or_set(WALLET_OVERVIEW_KEY, load, policy='normal')
+
+
 
 
 @bp.route('/users', methods=['GET'])
@@ -21,58 +137,70 @@ def admin_get_users():
         # Get query parameters for filtering and pagination
         search = request.args.get('search', '')
         status = request.args.get('status', '')  # 'active' or 'inactive'
-        limit = int(request.args.get('limit', 50))
-        offset = int(request.args.get('offset', 0))
-        
-        # Build query
-        query = User.query
+        limit = qp_limit(50)
+        offset = qp_int('offset', 0)
+        cursor = request.args.get('cursor')
+        
+        # Build query: only the listed columns, wallet joined in the same round-trip
+        query = db.session.query(
+            *USER_LIST_COLUMNS,
+            Wallet.wallet_id,
+            Wallet.balance,
+            Wallet.currency,
+            Wallet.status.label('wallet_status')
+        ).outerjoin(Wallet, Wallet.user_id == User.id)
         
         # Apply search filter
         if search:
             search_term = f"%{search}%"
-            query = query.filter(
-                or_(
-                    User.first_name.ilike(search_term),
-                    User.last_name.ilike(search_term),
-                    User.email.ilike(search_term)
-                )
-            )
+            query = query.filter(user_search_text.ilike(search_term))
         
         # Apply status filter
         if status:
-            query = query.filter_by(status=status)
+            query = query.filter(User.status == status)
         
-        # Get total count
-        total_count = query.count()
+        # Get total count (opt-in)
+        total_count = _total_count('users', query)
         
         # Apply pagination
-        users = query.order_by(User.created_at.desc()).limit(limit).offset(offset).all()
+        users, next_cursor = _paginate(query, User, limit, offset, cursor)
+        
+        # Transfer counts for the whole page in two grouped queries
+        user_ids = [user.id for user in users]
+        sent_counts = dict(
+            db.session.query(Transaction.sender_id, func.count(Transaction.id))
+            .filter(Transaction.type == 'transfer', Transaction.sender_id.in_(user_ids))
+            .group_by(Transaction.sender_id).all()
+        )
+        received_counts = dict(
+            db.session.query(Transaction.receiver_id, func.count(Transaction.id))
+            .filter(
+                Transaction.type == 'transfer',
+                Transaction.receiver_id.in_(user_ids),
+                Transaction.sender_id != Transaction.receiver_id
+            )
+            .group_by(Transaction.receiver_id).all()
+        )
         
         # Format user data with wallet info
         users_data = []
         for user in users:
-            user_dict = user.to_dict()
+            user_dict = {column.key: getattr(user, column.key) for column in USER_LIST_COLUMNS}
             
             # Add wallet information
-            if user.wallet:
+            if user.wallet_id:
                 user_dict['wallet'] = {
-                    'wallet_id': user.wallet.wallet_id,
-                    'balance': round(user.wallet.balance, 2),
-                    'currency': user.wallet.currency,
-                    'status': user.wallet.status
+                    'wallet_id': user.wallet_id,
+                    'balance': user.balance,
+                    'currency': user.currency,
+                    'status': user.wallet_status
                 }
             else:
                 user_dict['wallet'] = None
             
             # Add transaction statistics
-            sent_count = Transaction.query.filter_by(sender_id=user.id, type='transfer').count()
-            received_count = Transaction.query.filter(
-                and_(
-                    Transaction.receiver_id == user.id,
-                    Transaction.sender_id != user.id,
-                    Transaction.type == 'transfer'
-                )
-            ).count()
+            sent_count = sent_counts.get(user.id, 0)
+            received_count = received_counts.get(user.id, 0)
             
             user_dict['transaction_stats'] = {
                 'sent': sent_count,
@@ -88,13 +216,14 @@ def admin_get_users():
             'count': len(users_data),
             'total_count': total_count,
             'limit': limit,
-            'offset': offset
+            'offset': offset,
+            'next_cursor': next_cursor
         }), 200
         
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        print(f"Error in admin_get_users: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in admin_get_users")
         return jsonify({'error': str(e)}), 500
 
 
@@ -103,7 +232,7 @@ def admin_get_users():
 def admin_user_detail(user_id):
     """Get, update or delete user"""
     try:
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id, options=[joinedload(User.wallet)])
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -158,6 +287,7 @@ def admin_user_detail(user_id):
             
             user.updated_at = datetime.utcnow()
             db.session.commit()
+            invalidate_user_directory()
             
             return jsonify({
                 'success': True,
@@ -167,12 +297,14 @@ def admin_user_detail(user_id):
         
         elif request.method == 'DELETE':
             # Don't allow deleting the current admin
-            current_user_id = int(get_jwt_identity())
+            current_user_id = g.current_admin.id
             if user_id == current_user_id:
                 return jsonify({'error': 'Cannot delete your own account'}), 400
             
             db.session.delete(user)
             db.session.commit()
+            invalidate_user_directory()
+            invalidate_wallet(user_id)
             
             return jsonify({
                 'success': True,
@@ -181,9 +313,7 @@ def admin_user_detail(user_id):
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error in admin_user_detail: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in admin_user_detail")
         return jsonify({'error': str(e)}), 500
 
 
@@ -194,20 +324,21 @@ def admin_get_wallets():
     try:
         search = request.args.get('search', '')
         status = request.args.get('status', '')
-        limit = int(request.args.get('limit', 50))
-        offset = int(request.args.get('offset', 0))
+        limit = qp_limit(50)
+        offset = qp_int('offset', 0)
+        cursor = request.args.get('cursor')
         
-        # Build query
-        query = Wallet.query.join(User)
+        # Build query (populate wallet.user from the join instead of lazy loads)
+        query = Wallet.query.join(User).options(
+            contains_eager(Wallet.user).load_only(User.first_name, User.last_name, User.email, User.status)
+        )
         
         # Apply search filter
         if search:
             search_term = f"%{search}%"
             query = query.filter(
                 or_(
-                    User.first_name.ilike(search_term),
-                    User.last_name.ilike(search_term),
-                    User.email.ilike(search_term),
+                    user_search_text.ilike(search_term),
                     Wallet.wallet_id.ilike(search_term)
                 )
             )
@@ -216,11 +347,33 @@ def admin_get_wallets():
         if status:
             query = query.filter(Wallet.status == status)
         
-        # Get total count
-        total_count = query.count()
+        # Get total count (opt-in)
+        total_count = _total_count('wallets', query)
         
         # Get wallets with pagination
-        wallets = query.order_by(Wallet.created_at.desc()).limit(limit).offset(offset).all()
+        wallets, next_cursor = _paginate(query, Wallet, limit, offset, cursor)
+        
+        # Completed transfer totals for the whole page in two grouped queries
+        user_ids = [wallet.user_id for wallet in wallets]
+        sent_totals = dict(
+            db.session.query(Transaction.sender_id, func.sum(Transaction.total_amount))
+            .filter(
+                Transaction.sender_id.in_(user_ids),
+                Transaction.type == 'transfer',
+                Transaction.status == 'completed'
+            )
+            .group_by(Transaction.sender_id).all()
+        )
+        received_totals = dict(
+            db.session.query(Transaction.receiver_id, func.sum(Transaction.amount))
+            .filter(
+                Transaction.receiver_id.in_(user_ids),
+                Transaction.sender_id != Transaction.receiver_id,
+                Transaction.type == 'transfer',
+                Transaction.status == 'completed'
+            )
+            .group_by(Transaction.receiver_id).all()
+        )
         
         # Format wallet data
         wallet_list = []
@@ -236,33 +389,18 @@ def admin_get_wallets():
                 }
                 
                 # Add transaction statistics
-                total_sent = db.session.query(
-                    func.sum(Transaction.total_amount)
-                ).filter(
-                    Transaction.sender_id == wallet.user_id,
-                    Transaction.type == 'transfer',
-                    Transaction.status == 'completed'
-                ).scalar() or 0
-                
-                total_received = db.session.query(
-                    func.sum(Transaction.amount)
-                ).filter(
-                    Transaction.receiver_id == wallet.user_id,
-                    Transaction.sender_id != wallet.user_id,
-                    Transaction.type == 'transfer',
-                    Transaction.status == 'completed'
-                ).scalar() or 0
+                total_sent = sent_totals.get(wallet.user_id) or 0
+                total_received = received_totals.get(wallet.user_id) or 0
                 
                 wallet_data['transaction_totals'] = {
-                    'sent': round(total_sent, 2),
-                    'received': round(total_received, 2)
+                    'sent': total_sent,
+                    'received': total_received
                 }
             
             wallet_list.append(wallet_data)
         
         # Calculate overall statistics
-        total_balance = db.session.query(func.sum(Wallet.balance)).scalar() or 0
-        active_wallets = Wallet.query.filter_by(status='active').count()
+        total_balance, wallet_count, active_wallets = _wallet_overview()
         
         return jsonify({
             'success': True,
@@ -270,18 +408,19 @@ def admin_get_wallets():
             'count': len(wallet_list),
             'total_count': total_count,
             'statistics': {
-                'total_balance': round(total_balance, 2),
+                'total_balance': total_balance,
                 'active_wallets': active_wallets,
-                'average_balance': round(total_balance / max(total_count, 1), 2)
+                'average_balance': round(total_balance / max(wallet_count, 1), 2)
             },
             'limit': limit,
-            'offset': offset
+            'offset': offset,
+            'next_cursor': next_cursor
         }), 200
         
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        print(f"Error in admin_get_wallets: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in admin_get_wallets")
         return jsonify({'error': str(e)}), 500
 
 
@@ -297,64 +436,71 @@ def admin_adjust_wallet(wallet_id):
         
         data = request.get_json()
         action = data.get('action')  # 'add' or 'deduct'
-        amount = float(data.get('amount', 0))
+        amount = to_money(data.get('amount', 0))
         note = data.get('note', '')
         
         if amount <= 0:
             return jsonify({'error': 'Invalid amount'}), 400
         
-        old_balance = wallet.balance
-        
         if action == 'add':
-            wallet.balance += amount
+            delta = amount
             transaction_type = 'add_funds'
             transaction_note = f'Admin added funds: {note}' if note else 'Admin added funds'
         elif action == 'deduct':
-            if wallet.balance < amount:
-                return jsonify({'error': 'Insufficient balance'}), 400
-            wallet.balance -= amount
+            delta = -amount
             transaction_type = 'admin_deduction'
             transaction_note = f'Admin deducted funds: {note}' if note else 'Admin deducted funds'
         else:
             return jsonify({'error': 'Invalid action'}), 400
         
-        wallet.updated_at = datetime.utcnow()
+        # Apply the change in the database so concurrent adjustments can't
+        # overwrite each other; a deduction only matches if funds suffice
+        stmt = update(Wallet).where(Wallet.id == wallet.id)\
+            .values(balance=Wallet.balance + delta, updated_at=datetime.utcnow())\
+            .returning(Wallet.balance)
+        if action == 'deduct':
+            stmt = stmt.where(Wallet.balance >= amount)
+        new_balance = db.session.execute(stmt).scalar_one_or_none()
+        
+        if new_balance is None:
+            db.session.rollback()
+            return jsonify({'error': 'Insufficient balance'}), 400
+        
+        old_balance = new_balance - delta
         
         # Create transaction record for audit trail
-        from utils.helpers import generate_unique_id
-        admin_user_id = int(get_jwt_identity())
+        from utils.helpers import generate_sortable_id
+        admin_user_id = g.current_admin.id
         
-        transaction = Transaction(
-            transaction_id=generate_unique_id('ADM'),
+        db.session.execute(insert(Transaction).values(
+            transaction_id=generate_sortable_id('ADM'),
             sender_id=admin_user_id if action == 'add' else wallet.user_id,
             receiver_id=wallet.user_id if action == 'add' else admin_user_id,
             amount=amount,
-            fee=0.0,
+            fee=0,
             total_amount=amount,
             type=transaction_type,
             status='completed',
             note=transaction_note
-        )
-        
-        db.session.add(transaction)
+        ))
         db.session.commit()
+        invalidate_wallet(wallet.user_id)
+        invalidate_admin_stats()
         
         return jsonify({
             'success': True,
             'message': f'Wallet {action}ed successfully',
             'wallet': wallet.to_dict(),
-            'old_balance': round(old_balance, 2),
-            'new_balance': round(wallet.balance, 2),
-            'amount_changed': round(amount, 2)
+            'old_balance': old_balance,
+            'new_balance': new_balance,
+            'amount_changed': amount
         }), 200
         
     except ValueError:
         return jsonify({'error': 'Invalid amount format'}), 400
     except Exception as e:
         db.session.rollback()
-        print(f"Error in admin_adjust_wallet: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in admin_adjust_wallet")
         return jsonify({'error': str(e)}), 500
 
 
@@ -367,10 +513,11 @@ def admin_get_transactions():
         transaction_type = request.args.get('type', 'all')  # 'all', 'transfer', 'deposit'
         status = request.args.get('status', '')  # 'completed', 'pending', 'failed'
         search = request.args.get('search', '')
-        limit = int(request.args.get('limit', 100))
-        offset = int(request.args.get('offset', 0))
-        date_from = request.args.get('date_from', '')
-        date_to = request.args.get('date_to', '')
+        limit = qp_limit(100)
+        offset = qp_int('offset', 0)
+        cursor = request.args.get('cursor')
+        date_from = qp_date('date_from')
+        date_to = qp_date('date_to')
         
         # Build query
         query = Transaction.query
@@ -385,45 +532,28 @@ def admin_get_transactions():
         
         # Apply date filters
         if date_from:
-            date_from_obj = datetime.strptime(date_from, '%Y-%m-%d')
-            query = query.filter(Transaction.created_at >= date_from_obj)
+            query = query.filter(Transaction.created_at >= date_from)
         
         if date_to:
-            date_to_obj = datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1)
-            query = query.filter(Transaction.created_at < date_to_obj)
+            query = query.filter(Transaction.created_at < date_to + timedelta(days=1))
         
         # Apply search filter
         if search:
             search_term = f"%{search}%"
-            query = query.filter(
-                or_(
-                    Transaction.transaction_id.ilike(search_term),
-                    Transaction.note.ilike(search_term)
-                )
-            )
+            query = query.filter(transaction_search_text.ilike(search_term))
+        
+        # Export: stream every match instead of one page
+        if request.args.get('stream') == '1':
+            return _stream_transactions(query)
         
-        # Get total count
-        total_count = query.count()
+        # Get total count (opt-in)
+        total_count = _total_count('transactions', query)
         
         # Get transactions with pagination
-        transactions = query.order_by(Transaction.created_at.desc())\
-            .limit(limit).offset(offset).all()
+        transactions, next_cursor = _paginate(_with_parties(query), Transaction, limit, offset, cursor)
         
         # Format transaction data with user names
-        transactions_list = []
-        for t in transactions:
-            t_data = t.to_dict()
-            
-            # Get sender and receiver info
-            sender = User.query.get(t.sender_id)
-            receiver = User.query.get(t.receiver_id)
-            
-            t_data['sender_name'] = f"{sender.first_name} {sender.last_name}" if sender else None
-            t_data['sender_email'] = sender.email if sender else None
-            t_data['receiver_name'] = f"{receiver.first_name} {receiver.last_name}" if receiver else None
-            t_data['receiver_email'] = receiver.email if receiver else None
-            
-            transactions_list.append(t_data)
+        transactions_list = [_transaction_with_parties(t) for t in transactions]
         
         return jsonify({
             'success': True,
@@ -431,16 +561,138 @@ def admin_get_transactions():
             'count': len(transactions_list),
             'total_count': total_count,
             'limit': limit,
-            'offset': offset
+            'offset': offset,
+            'next_cursor': next_cursor
         }), 200
         
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        print(f"Error in admin_get_transactions: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in admin_get_transactions")
         return jsonify({'error': str(e)}), 500
 
 
+def _system_stats(period):
+    """
+    Compute the admin statistics for one period
+    
+    Args:
+        period (str): 'today', 'week', 'month', 'year' or 'all'
+    
+    Returns:
+        dict: users, transactions, revenue, wallets, daily_trend and
+        recent_transactions sections of the stats response
+    """
+    # Calculate date range
+    end_date = datetime.utcnow()
+    if period == 'today':
+        start_date = end_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    elif period == 'week':
+        start_date = end_date - timedelta(days=7)
+    elif period == 'month':
+        start_date = end_date - timedelta(days=30)
+    elif period == 'year':
+        start_date = end_date - timedelta(days=365)
+    else:
+        start_date = None
+    
+    # User statistics in one aggregate query
+    total_users, active_users, new_users = db.session.query(
+        func.count(User.id),
+        func.count(User.id).filter(User.status == 'active'),
+        func.count(User.id).filter(User.created_at >= start_date) if start_date else func.count(User.id)
+    ).one()
+    
+    # Transaction, revenue and volume statistics in one aggregate query
+    completed = Transaction.status == 'completed'
+    transaction_stats = db.session.query(
+        func.count(Transaction.id).filter(completed),
+        func.count(Transaction.id).filter(completed, Transaction.type == 'transfer'),
+        func.count(Transaction.id).filter(
+            completed,
+            Transaction.type.in_(['add_funds', 'pesapay_deposit'])
+        ),
+        func.sum(Transaction.fee).filter(completed),
+        func.sum(Transaction.amount).filter(completed, Transaction.type == 'transfer'),
+        func.count(Transaction.id).filter(Transaction.status == 'failed'),
+        func.count(Transaction.id).filter(Transaction.status == 'pending')
+    )
+    if start_date:
+        transaction_stats = transaction_stats.filter(Transaction.created_at >= start_date)
+    (total_transactions, transfer_count, deposit_count, total_revenue,
+     total_volume, failed_count, pending_count) = transaction_stats.one()
+    total_revenue = total_revenue or 0
+    total_volume = total_volume or 0
+    
+    # Wallet Statistics
+    total_wallet_balance, _, active_wallets = _wallet_overview()
+    average_balance = total_wallet_balance / max(active_wallets, 1)
+    
+    # Recent transactions (last 10)
+    recent_transactions = _with_parties(Transaction.query)\
+        .order_by(Transaction.created_at.desc())\
+        .limit(10).all()
+    
+    recent_tx_list = []
+    for tx in recent_transactions:
+        tx_data = tx.to_dict()
+        sender = tx.sender
+        receiver = tx.receiver
+        tx_data['sender_name'] = f"{sender.first_name} {sender.last_name}" if sender else None
+        tx_data['receiver_name'] = f"{receiver.first_name} {receiver.last_name}" if receiver else None
+        recent_tx_list.append(tx_data)
+    
+    # Daily transaction trend (last 7 days) in one grouped query
+    first_day = (end_date - timedelta(days=6)).replace(hour=0, minute=0, second=0, microsecond=0)
+    day = func.date(Transaction.created_at)
+    daily_rows = db.session.query(
+        day,
+        func.count(Transaction.id),
+        func.sum(Transaction.amount).filter(Transaction.type == 'transfer')
+    ).filter(
+        Transaction.created_at >= first_day,
+        Transaction.status == 'completed'
+    ).group_by(day).all()
+    daily_totals = {str(row[0]): row[1:] for row in daily_rows}
+    
+    daily_stats = []
+    for i in range(7):
+        date_key = (first_day + timedelta(days=i)).strftime('%Y-%m-%d')
+        day_count, day_volume = daily_totals.get(date_key, (0, 0))
+        
+        daily_stats.append({
+            'date': date_key,
+            'count': day_count,
+            'volume': day_volume or 0
+        })
+    
+    return {
+        'users': {
+            'total': total_users,
+            'active': active_users,
+            'new': new_users
+        },
+        'transactions': {
+            'total': total_transactions,
+            'transfers': transfer_count,
+            'deposits': deposit_count,
+            'failed': failed_count,
+            'pending': pending_count
+        },
+        'revenue': {
+            'total': total_revenue,
+            'average_per_transaction': round(total_revenue / max(total_transactions, 1), 2)
+        },
+        'wallets': {
+            'total_balance': total_wallet_balance,
+            'active_wallets': active_wallets,
+            'average_balance': round(average_balance, 2)
+        },
+        'daily_trend': daily_stats,
+        'recent_transactions': recent_tx_list
+    }
+
+
 @bp.route('/stats', methods=['GET'])
 @admin_required
 def admin_stats():
@@ -448,200 +700,68 @@ def admin_stats():
     try:
         # Get time period from query params
         period = request.args.get('period', 'all')  # 'today', 'week', 'month', 'year', 'all'
+        period_key = period if period in STATS_PERIODS else 'all'
         
-        # Calculate date range
-        end_date = datetime.utcnow()
-        if period == 'today':
-            start_date = end_date.replace(hour=0, minute=0, second=0, microsecond=0)
-        elif period == 'week':
-            start_date = end_date - timedelta(days=7)
-        elif period == 'month':
-            start_date = end_date - timedelta(days=30)
-        elif period == 'year':
-            start_date = end_date - timedelta(days=365)
-        else:
-            start_date = None
-        
-        # User Statistics
-        total_users = User.query.count()
-        active_users = User.query.filter_by(status='active').count()
-        admin_users = User.query.filter_by(role='admin').count()
-        
-        # New users in period
-        new_users_query = User.query
-        if start_date:
-            new_users_query = new_users_query.filter(User.created_at >= start_date)
-        new_users = new_users_query.count()
-        
-        # Transaction Statistics
-        completed_transactions_query = Transaction.query.filter_by(status='completed')
-        if start_date:
-            completed_transactions_query = completed_transactions_query.filter(
-                Transaction.created_at >= start_date
-            )
-        
-        total_transactions = completed_transactions_query.count()
-        
-        # Transaction volume by type
-        transfer_count = completed_transactions_query.filter_by(type='transfer').count()
-        deposit_count = completed_transactions_query.filter(
-            or_(
-                Transaction.type == 'add_funds',
-                Transaction.type == 'pesapay_deposit'
-            )
-        ).count()
-        
-        # Revenue Statistics
-        total_revenue = db.session.query(func.sum(Transaction.fee)).filter(
-            Transaction.status == 'completed'
+        # Polled by dashboards; a minute of staleness is fine
+        stats = get_or_set(
+            admin_stats_key(period_key),
+            lambda: _system_stats(period_key),
+            policy='long'
         )
-        if start_date:
-            total_revenue = total_revenue.filter(Transaction.created_at >= start_date)
-        total_revenue = total_revenue.scalar() or 0
-        
-        # Total transaction volume
-        total_volume = db.session.query(func.sum(Transaction.amount)).filter(
-            Transaction.status == 'completed',
-            Transaction.type == 'transfer'
-        )
-        if start_date:
-            total_volume = total_volume.filter(Transaction.created_at >= start_date)
-        total_volume = total_volume.scalar() or 0
-        
-        # Wallet Statistics
-        total_wallet_balance = db.session.query(func.sum(Wallet.balance)).scalar() or 0
-        active_wallets = Wallet.query.filter_by(status='active').count()
-        average_balance = total_wallet_balance / max(active_wallets, 1)
-        
-        # Failed transactions
-        failed_transactions = Transaction.query.filter_by(status='failed')
-        if start_date:
-            failed_transactions = failed_transactions.filter(Transaction.created_at >= start_date)
-        failed_count = failed_transactions.count()
-        
-        # Pending transactions
-        pending_transactions = Transaction.query.filter_by(status='pending')
-        if start_date:
-            pending_transactions = pending_transactions.filter(Transaction.created_at >= start_date)
-        pending_count = pending_transactions.count()
-        
-        # Recent transactions (last 10)
-        recent_transactions = Transaction.query\
-            .order_by(Transaction.created_at.desc())\
-            .limit(10).all()
-        
-        recent_tx_list = []
-        for tx in recent_transactions:
-            tx_data = tx.to_dict()
-            sender = User.query.get(tx.sender_id)
-            receiver = User.query.get(tx.receiver_id)
-            tx_data['sender_name'] = f"{sender.first_name} {sender.last_name}" if sender else None
-            tx_data['receiver_name'] = f"{receiver.first_name} {receiver.last_name}" if receiver else None
-            recent_tx_list.append(tx_data)
-        
-        # Daily transaction trend (last 7 days)
-        daily_stats = []
-        for i in range(6, -1, -1):
-            day_start = (end_date - timedelta(days=i)).replace(hour=0, minute=0, second=0, microsecond=0)
-            day_end = day_start + timedelta(days=1)
-            
-            day_count = Transaction.query.filter(
-                Transaction.created_at >= day_start,
-                Transaction.created_at < day_end,
-                Transaction.status == 'completed'
-            ).count()
-            
-            day_volume = db.session.query(func.sum(Transaction.amount)).filter(
-                Transaction.created_at >= day_start,
-                Transaction.created_at < day_end,
-                Transaction.status == 'completed',
-                Transaction.type == 'transfer'
-            ).scalar() or 0
-            
-            daily_stats.append({
-                'date': day_start.strftime('%Y-%m-%d'),
-                'count': day_count,
-                'volume': round(day_volume, 2)
-            })
         
         return jsonify({
             'success': True,
             'period': period,
-            'users': {
-                'total': total_users,
-                'active': active_users,
-                'new': new_users
-            },
-            'transactions': {
-                'total': total_transactions,
-                'transfers': transfer_count,
-                'deposits': deposit_count,
-                'failed': failed_count,
-                'pending': pending_count
-            },
-            'revenue': {
-                'total': round(total_revenue, 2),
-                'average_per_transaction': round(total_revenue / max(total_transactions, 1), 2)
-            },
-            'wallets': {
-                'total_balance': round(total_wallet_balance, 2),
-                'active_wallets': active_wallets,
-                'average_balance': round(average_balance, 2)
-            },
-            'daily_trend': daily_stats,
-            'recent_transactions': recent_tx_list
+            **stats
         }), 200
         
     except Exception as e:
-        print(f"Error in admin_stats: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in admin_stats")
         return jsonify({'error': str(e)}), 500
 
 
+def _dashboard_overview():
+    """Compute the dashboard scalars in a single round-trip"""
+    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    last_week = datetime.utcnow() - timedelta(days=7)
+    completed_today = and_(Transaction.created_at >= today_start, Transaction.status == 'completed')
+    
+    (total_users, active_users, users_last_week,
+     today_transactions, today_revenue, total_balance) = db.session.execute(select(
+        select(func.count(User.id)).scalar_subquery(),
+        select(func.count(User.id)).where(User.status == 'active').scalar_subquery(),
+        select(func.count(User.id)).where(User.created_at < last_week).scalar_subquery(),
+        select(func.count(Transaction.id)).where(completed_today).scalar_subquery(),
+        select(func.sum(Transaction.fee)).where(completed_today).scalar_subquery(),
+        select(func.sum(Wallet.balance)).scalar_subquery()
+    )).one()
+    
+    # Growth calculations (compare with last week)
+    user_growth = ((total_users - users_last_week) / max(users_last_week, 1)) * 100
+    
+    return {
+        'total_users': total_users,
+        'active_users': active_users,
+        'user_growth': round(user_growth, 1),
+        'today_transactions': today_transactions,
+        'today_revenue': today_revenue or 0,
+        'total_wallet_balance': total_balance or 0
+    }
+
+
 @bp.route('/dashboard', methods=['GET'])
 @admin_required
 def admin_dashboard():
     """Get dashboard overview data"""
     try:
-        # Quick stats for dashboard
-        total_users = User.query.count()
-        active_users = User.query.filter_by(status='active').count()
-        
-        # Today's stats
-        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_transactions = Transaction.query.filter(
-            Transaction.created_at >= today_start,
-            Transaction.status == 'completed'
-        ).count()
-        
-        today_revenue = db.session.query(func.sum(Transaction.fee)).filter(
-            Transaction.created_at >= today_start,
-            Transaction.status == 'completed'
-        ).scalar() or 0
-        
-        # Total wallet balance
-        total_balance = db.session.query(func.sum(Wallet.balance)).scalar() or 0
-        
-        # Growth calculations (compare with last week)
-        last_week = datetime.utcnow() - timedelta(days=7)
-        users_last_week = User.query.filter(User.created_at < last_week).count()
-        user_growth = ((total_users - users_last_week) / max(users_last_week, 1)) * 100
+        # Rendered on every admin page load; a minute of staleness is fine
+        overview = get_or_set('admin:dashboard', _dashboard_overview, policy='long')
         
         return jsonify({
             'success': True,
-            'overview': {
-                'total_users': total_users,
-                'active_users': active_users,
-                'user_growth': round(user_growth, 1),
-                'today_transactions': today_transactions,
-                'today_revenue': round(today_revenue, 2),
-                'total_wallet_balance': round(total_balance, 2)
-            }
+            'overview': overview
         }), 200
         
     except Exception as e:
-        print(f"Error in admin_dashboard: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in admin_dashboard")
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
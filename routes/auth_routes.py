@@ -1,10 +1,16 @@
+import logging
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from __init__ import db
+from flask_jwt_extended import create_access_token, jwt_required
+from extensions import db
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 from models import User, Wallet
 from utils.helpers import generate_unique_id
+from utils.cache_helpers import invalidate_user_directory, invalidate_wallet_overview
+from utils.decorators import get_request_user
 
 bp = Blueprint('auth', __name__, url_prefix='/api/auth')
+logger = logging.getLogger(__name__)
 
 
 @bp.route('/register', methods=['POST'])
@@ -19,10 +25,6 @@ def register():
             if field not in data or not data[field]:
                 return jsonify({'error': f'{field} is required'}), 400
         
-        # Check if user already exists
-        if User.query.filter_by(email=data['email'].lower().strip()).first():
-            return jsonify({'error': 'Email already registered'}), 400
-        
         # Create new user
         user = User(
             first_name=data['first_name'].strip(),
@@ -33,32 +35,45 @@ def register():
         )
         user.set_password(data['password'])
         
-        db.session.add(user)
-        db.session.flush()
-        
-        # Create wallet for user
+        # Create wallet for user; both INSERTs go out in one flush
         wallet = Wallet(
-            user_id=user.id,
             wallet_id=generate_unique_id('QP'),
-            balance=0.0
+            balance=0
         )
-        db.session.add(wallet)
+        user.wallet = wallet
+        db.session.add(user)
+        
+        # The unique index on email rejects duplicates, even concurrent ones
+        try:
+            db.session.flush()
+        except IntegrityError as e:
+            db.session.rollback()
+            if 'email' in str(e.orig):
+                return jsonify({'error': 'Email already registered'}), 400
+            raise
+        
+        # Serialize before commit so the expired objects aren't reloaded
+        user_data = user.to_dict()
+        wallet_data = wallet.to_dict()
+        
         db.session.commit()
+        invalidate_user_directory()
+        invalidate_wallet_overview()
         
         # Generate access token
-        access_token = create_access_token(identity=str(user.id))
+        access_token = create_access_token(identity=str(user_data['id']))
         
         return jsonify({
             'success': True,
             'message': 'Registration successful',
             'access_token': access_token,
-            'user': user.to_dict(),
-            'wallet': wallet.to_dict()
+            'user': user_data,
+            'wallet': wallet_data
         }), 201
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error in register: {str(e)}")
+        logger.exception("Error in register")
         return jsonify({'error': str(e)}), 500
 
 
@@ -71,8 +86,9 @@ def login():
         if not data.get('email') or not data.get('password'):
             return jsonify({'error': 'Email and password are required'}), 400
         
-        # Get user by email (case insensitive)
-        user = User.query.filter_by(email=data['email'].lower().strip()).first()
+        # Get user by email (case insensitive), wallet joined in
+        user = User.query.options(joinedload(User.wallet))\
+            .filter_by(email=data['email'].lower().strip()).first()
         
         if not user or not user.check_password(data['password']):
             return jsonify({'error': 'Invalid email or password'}), 401
@@ -92,7 +108,7 @@ def login():
         }), 200
         
     except Exception as e:
-        print(f"Error in login: {str(e)}")
+        logger.exception("Error in login")
         return jsonify({'error': str(e)}), 500
 
 
@@ -101,8 +117,7 @@ def login():
 def get_current_user():
     """Get current authenticated user"""
     try:
-        current_user_id = int(get_jwt_identity())
-        user = User.query.get(current_user_id)
+        user = get_request_user(with_wallet=True)
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -114,5 +129,5 @@ def get_current_user():
         }), 200
         
     except Exception as e:
-        print(f"Error in get_current_user: {str(e)}")
+        logger.exception("Error in get_current_user")
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
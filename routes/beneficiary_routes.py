@@ -1,9 +1,11 @@
+import logging
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from __init__ import db
+from extensions import db
 from models import Beneficiary
 
 bp = Blueprint('beneficiary', __name__, url_prefix='/api/beneficiaries')
+logger = logging.getLogger(__name__)
 
 
 @bp.route('', methods=['GET', 'POST'])
@@ -48,7 +50,7 @@ def beneficiaries():
 
     except Exception as e:
         db.session.rollback()
-        print(f"Error in beneficiaries: {str(e)}")
+        logger.exception("Error in beneficiaries")
         return jsonify({'error': str(e)}), 500
 
 
@@ -104,5 +106,5 @@ def beneficiary_detail(beneficiary_id):
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error in beneficiary_detail: {str(e)}")
+        logger.exception("Error in beneficiary_detail")
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
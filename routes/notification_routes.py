@@ -1,13 +1,40 @@
 """
 Notification routes for managing user notifications
 """
+import logging
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from __init__ import db
+from extensions import db
 from models.notification import Notification
+from utils.cache_helpers import get_or_set, unread_count_key, set_unread_count, invalidate_unread_count
+from utils.helpers import ValidationError, encode_cursor, decode_cursor
+from utils.params import qp_int, qp_limit
 from datetime import datetime
+from sqlalchemy import select, update, delete, func, lambda_stmt, tuple_
 
 bp = Blueprint('notifications', __name__, url_prefix='/api/notifications')
+logger = logging.getLogger(__name__)
+
+
+def _count_unread(user_id):
+    """COUNT of a user's unread notifications (cached lambda statement)"""
+    return db.session.execute(lambda_stmt(lambda: select(func.count(Notification.id)).where(
+        Notification.user_id == user_id,
+        Notification.is_read == False
+    ))).scalar()
+
+
+def _not_found_or_forbidden(notification_id):
+    """
+    Response for a conditional UPDATE/DELETE that matched no row
+    
+    Only runs on the miss path, to tell a missing notification (404)
+    from someone else's (403).
+    """
+    exists = db.session.scalar(select(Notification.id).where(Notification.id == notification_id))
+    if exists is None:
+        return jsonify({'error': 'Notification not found'}), 404
+    return jsonify({'error': 'Unauthorized'}), 403
 
 
 @bp.route('', methods=['GET'])
@@ -19,37 +46,62 @@ def get_notifications():
         
         # Get query parameters
         unread_only = request.args.get('unread_only', 'false').lower() == 'true'
-        limit = int(request.args.get('limit', 50))
-        offset = int(request.args.get('offset', 0))
-        
-        # Build query
-        query = Notification.query.filter_by(user_id=current_user_id)
-        
-        if unread_only:
-            query = query.filter_by(is_read=False)
-        
-        # Get total count
-        total_count = query.count()
-        unread_count = Notification.query.filter_by(
-            user_id=current_user_id,
-            is_read=False
-        ).count()
+        skip_total = request.args.get('skip_total', 'false').lower() == 'true'
+        limit = qp_limit(50)
+        offset = qp_int('offset', 0)
+        cursor = request.args.get('cursor')
+        
+        # Hot path: lambda statements are built once per call site and then
+        # reused from the statement cache with fresh parameter values
+        
+        if skip_total:
+            # Client pages with has_more; only the (cached) badge count is needed
+            total_count = None
+            unread_count = get_or_set(
+                unread_count_key(current_user_id),
+                lambda: _count_unread(current_user_id),
+                policy='short'
+            )
+        else:
+            # Total and unread counts in one pass over the user's index range
+            all_count, unread_count = db.session.execute(lambda_stmt(lambda: select(
+                func.count(Notification.id),
+                func.count(Notification.id).filter(Notification.is_read == False)
+            ).where(Notification.user_id == current_user_id))).one()
+            total_count = unread_count if unread_only else all_count
         
         # Get notifications
-        notifications = query.order_by(Notification.created_at.desc())\
-            .limit(limit).offset(offset).all()
+        stmt = lambda_stmt(lambda: select(Notification).where(Notification.user_id == current_user_id))
+        if unread_only:
+            stmt += lambda s: s.where(Notification.is_read == False)
+        stmt += lambda s: s.order_by(Notification.created_at.desc(), Notification.id.desc()).limit(limit)
+        if cursor:
+            # Keyset page after the previous page's last row; cost doesn't grow with depth
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+            after_cursor = tuple_(Notification.created_at, Notification.id) < (cursor_created_at, cursor_id)
+            stmt += lambda s: s.where(after_cursor)
+        else:
+            stmt += lambda s: s.offset(offset)
+        notifications = db.session.scalars(stmt).all()
+        
+        has_more = len(notifications) == limit
+        next_cursor = encode_cursor(notifications[-1].created_at, notifications[-1].id) if has_more else None
         
         return jsonify({
             'success': True,
             'notifications': [n.to_dict() for n in notifications],
             'total_count': total_count,
             'unread_count': unread_count,
+            'has_more': has_more,
             'limit': limit,
-            'offset': offset
+            'offset': offset,
+            'next_cursor': next_cursor
         }), 200
         
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        print(f"Error in get_notifications: {str(e)}")
+        logger.exception("Error in get_notifications")
         return jsonify({'error': str(e)}), 500
 
 
@@ -60,25 +112,31 @@ def mark_as_read(notification_id):
     try:
         current_user_id = int(get_jwt_identity())
         
-        notification = Notification.query.get(notification_id)
+        # Ownership check and update in one statement
+        notification = db.session.execute(
+            update(Notification)
+            .where(Notification.id == notification_id, Notification.user_id == current_user_id)
+            .values(is_read=True, read_at=func.coalesce(Notification.read_at, datetime.utcnow()))
+            .returning(Notification)
+        ).scalar()
         
-        if not notification:
-            return jsonify({'error': 'Notification not found'}), 404
+        if notification is None:
+            return _not_found_or_forbidden(notification_id)
         
-        # Check ownership
-        if notification.user_id != current_user_id:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        notification.mark_as_read()
+        # Serialize before commit expires the instance (no refresh SELECT)
+        notification_data = notification.to_dict()
+        db.session.commit()
+        invalidate_unread_count(current_user_id)
         
         return jsonify({
             'success': True,
             'message': 'Notification marked as read',
-            'notification': notification.to_dict()
+            'notification': notification_data
         }), 200
         
     except Exception as e:
-        print(f"Error in mark_as_read: {str(e)}")
+        db.session.rollback()
+        logger.exception("Error in mark_as_read")
         return jsonify({'error': str(e)}), 500
 
 
@@ -96,9 +154,11 @@ def mark_all_as_read():
         ).update({
             'is_read': True,
             'read_at': datetime.utcnow()
-        })
+        }, synchronize_session=False)
         
         db.session.commit()
+        # Nothing is unread any more; prime the badge instead of dropping it
+        set_unread_count(current_user_id, 0)
         
         return jsonify({
             'success': True,
@@ -108,7 +168,7 @@ def mark_all_as_read():
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error in mark_all_as_read: {str(e)}")
+        logger.exception("Error in mark_all_as_read")
         return jsonify({'error': str(e)}), 500
 
 
@@ -119,17 +179,17 @@ def delete_notification(notification_id):
     try:
         current_user_id = int(get_jwt_identity())
         
-        notification = Notification.query.get(notification_id)
-        
-        if not notification:
-            return jsonify({'error': 'Notification not found'}), 404
+        deleted_id = db.session.execute(
+            delete(Notification)
+            .where(Notification.id == notification_id, Notification.user_id == current_user_id)
+            .returning(Notification.id)
+        ).scalar()
         
-        # Check ownership
-        if notification.user_id != current_user_id:
-            return jsonify({'error': 'Unauthorized'}), 403
+        if deleted_id is None:
+            return _not_found_or_forbidden(notification_id)
         
-        db.session.delete(notification)
         db.session.commit()
+        invalidate_unread_count(current_user_id)
         
         return jsonify({
             'success': True,
@@ -138,7 +198,7 @@ def delete_notification(notification_id):
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error in delete_notification: {str(e)}")
+        logger.exception("Error in delete_notification")
         return jsonify({'error': str(e)}), 500
 
 
@@ -153,7 +213,7 @@ def clear_all_notifications():
         deleted_count = Notification.query.filter_by(
             user_id=current_user_id,
             is_read=True
-        ).delete()
+        ).delete(synchronize_session=False)
         
         db.session.commit()
         
@@ -165,7 +225,7 @@ def clear_all_notifications():
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error in clear_all_notifications: {str(e)}")
+        logger.exception("Error in clear_all_notifications")
         return jsonify({'error': str(e)}), 500
 
 
@@ -176,10 +236,11 @@ def get_unread_count():
     try:
         current_user_id = int(get_jwt_identity())
         
-        unread_count = Notification.query.filter_by(
-            user_id=current_user_id,
-            is_read=False
-        ).count()
+        unread_count = get_or_set(
+            unread_count_key(current_user_id),
+            lambda: _count_unread(current_user_id),
+            policy='short'
+        )
         
         return jsonify({
             'success': True,
@@ -187,5 +248,5 @@ def get_unread_count():
         }), 200
         
     except Exception as e:
-        print(f"Error in get_unread_count: {str(e)}")
+        logger.exception("Error in get_unread_count")
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
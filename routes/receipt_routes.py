@@ -1,14 +1,49 @@
 """
 Receipt generation routes
 """
+import logging
 from flask import Blueprint, request, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from __init__ import db
-from models import Transaction, User, Wallet
-from utils.receipt_generator import generate_transaction_receipt, generate_wallet_statement
+from extensions import db
+from models import Transaction
+from models.transaction import get_with_parties as get_transaction_with_parties
 from datetime import datetime, timedelta
+from sqlalchemy import func
+from utils.cache_helpers import get_or_set, receipt_key, statement_key
+from utils.decorators import get_request_user
+import io
 
 bp = Blueprint('receipts', __name__, url_prefix='/api/receipts')
+logger = logging.getLogger(__name__)
+
+
+def _render_receipt(transaction):
+    """
+    Rendered receipt PDF bytes, cached until the receipt's content changes
+    
+    A transaction's receipt only changes with its status or its parties'
+    details, so re-downloads and emails reuse the first rendering.
+    
+    Args:
+        transaction (Transaction): Transaction with sender and receiver loaded
+    
+    Returns:
+        bytes: PDF document
+    """
+    sender = transaction.sender
+    receiver = transaction.receiver
+    fingerprint = (
+        transaction.status, transaction.updated_at,
+        sender.first_name, sender.last_name, sender.email, sender.phone,
+        receiver.first_name, receiver.last_name, receiver.email, receiver.phone
+    )
+    
+    def render():
+        # reportlab/qrcode are imported on first use, not at worker boot
+        from utils.receipt_generator import generate_transaction_receipt
+        return generate_transaction_receipt(transaction, sender, receiver).getvalue()
+    
+    return get_or_set(receipt_key(transaction.transaction_id, fingerprint), render, policy='document', fallback=False)
 
 
 @bp.route('/transaction/<string:transaction_id>', methods=['GET'])
@@ -18,8 +53,8 @@ def download_transaction_receipt(transaction_id):
     try:
         current_user_id = int(get_jwt_identity())
         
-        # Get transaction
-        transaction = Transaction.query.filter_by(transaction_id=transaction_id).first()
+        # Get transaction with sender and receiver
+        transaction = get_transaction_with_parties(transaction_id)
         
         if not transaction:
             return {'error': 'Transaction not found'}, 404
@@ -28,28 +63,25 @@ def download_transaction_receipt(transaction_id):
         if transaction.sender_id != current_user_id and transaction.receiver_id != current_user_id:
             return {'error': 'Unauthorized to access this receipt'}, 403
         
-        # Get sender and receiver
-        sender = User.query.get(transaction.sender_id)
-        receiver = User.query.get(transaction.receiver_id)
+        sender = transaction.sender
+        receiver = transaction.receiver
         
         if not sender or not receiver:
             return {'error': 'User data not found'}, 404
         
-        # Generate receipt
-        receipt_buffer = generate_transaction_receipt(transaction, sender, receiver)
+        # Generate receipt (or reuse the cached one)
+        receipt_pdf = _render_receipt(transaction)
         
         # Send file
         return send_file(
-            receipt_buffer,
+            io.BytesIO(receipt_pdf),
             mimetype='application/pdf',
             as_attachment=True,
             download_name=f'receipt_{transaction_id}.pdf'
         )
         
     except Exception as e:
-        print(f"Error generating receipt: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error generating receipt")
         return {'error': 'Failed to generate receipt'}, 500
 
 
@@ -76,9 +108,9 @@ def download_wallet_statement():
         else:  # all
             start_date = None
         
-        # Get user and wallet
-        user = User.query.get(current_user_id)
-        wallet = Wallet.query.filter_by(user_id=current_user_id).first()
+        # Get user and wallet in one query
+        user = get_request_user(with_wallet=True)
+        wallet = user.wallet if user else None
         
         if not user or not wallet:
             return {'error': 'User or wallet not found'}, 404
@@ -92,26 +124,47 @@ def download_wallet_statement():
         if start_date:
             query = query.filter(Transaction.created_at >= start_date)
         
-        transactions = query.order_by(Transaction.created_at.desc()).all()
+        # Repeat downloads reuse the rendered PDF until something on it changes
+        # (new or updated transactions, balance, or the printed date)
+        tx_count, last_id, last_updated = query.with_entities(
+            func.count(Transaction.id),
+            func.max(Transaction.id),
+            func.max(Transaction.updated_at)
+        ).one()
+        fingerprint = (
+            end_date.date(), tx_count, last_id, last_updated,
+            wallet.balance, wallet.updated_at, user.first_name, user.last_name, user.email
+        )
         
-        # Generate statement
-        statement_buffer = generate_wallet_statement(
-            wallet, user, transactions, start_date, end_date
+        def render():
+            # Oldest first, streamed from a server-side cursor in batches
+            transactions = query.order_by(Transaction.created_at, Transaction.id)\
+                .execution_options(stream_results=True).yield_per(1000)
+            
+            # Generate statement
+            from utils.receipt_generator import generate_wallet_statement
+            return generate_wallet_statement(
+                wallet, user, transactions, start_date, end_date
+            ).getvalue()
+        
+        statement_pdf = get_or_set(
+            statement_key(wallet.wallet_id, period, fingerprint),
+            render,
+            policy='document',
+            fallback=False
         )
         
         # Send file
         filename = f'statement_{wallet.wallet_id}_{period}.pdf'
         return send_file(
-            statement_buffer,
+            io.BytesIO(statement_pdf),
             mimetype='application/pdf',
             as_attachment=True,
             download_name=filename
         )
         
     except Exception as e:
-        print(f"Error generating statement: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error generating statement")
         return {'error': 'Failed to generate statement'}, 500
 
 
@@ -127,8 +180,8 @@ def email_transaction_receipt(transaction_id):
         if not email:
             return {'error': 'Email address is required'}, 400
         
-        # Get transaction
-        transaction = Transaction.query.filter_by(transaction_id=transaction_id).first()
+        # Get transaction with sender and receiver
+        transaction = get_transaction_with_parties(transaction_id)
         
         if not transaction:
             return {'error': 'Transaction not found'}, 404
@@ -137,12 +190,8 @@ def email_transaction_receipt(transaction_id):
         if transaction.sender_id != current_user_id and transaction.receiver_id != current_user_id:
             return {'error': 'Unauthorized'}, 403
         
-        # Get sender and receiver
-        sender = User.query.get(transaction.sender_id)
-        receiver = User.query.get(transaction.receiver_id)
-        
-        # Generate receipt
-        receipt_buffer = generate_transaction_receipt(transaction, sender, receiver)
+        # Generate receipt (or reuse the cached one)
+        receipt_pdf = _render_receipt(transaction)
         
         # TODO: Implement email sending
         # This would require setting up an email service (SendGrid, AWS SES, etc.)
@@ -155,5 +204,5 @@ def email_transaction_receipt(transaction_id):
         }, 200
         
     except Exception as e:
-        print(f"Error emailing receipt: {str(e)}")
+        logger.exception("Error emailing receipt")
         return {'error': 'Failed to email receipt'}, 500
\ No newline at end of file
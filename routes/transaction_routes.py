@@ -1,21 +1,63 @@
-from flask import Blueprint, request, jsonify
+import logging
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from __init__ import db
+from extensions import db
 from models import User, Wallet, Transaction
-from utils.helpers import generate_unique_id
+from models.transaction import LIST_COLUMNS, get_with_parties as get_transaction_with_parties
+from sqlalchemy import select, or_, tuple_
+from sqlalchemy.orm import aliased, joinedload
+from utils.helpers import generate_sortable_id, to_money, calculate_fee, ValidationError, encode_cursor, decode_cursor
+from utils.params import qp_int, qp_limit
+from utils.cache_helpers import invalidate_wallet, invalidate_unread_count, invalidate_admin_stats
 from datetime import datetime
 from utils.notification_helpers import send_transaction_notification
+from utils.decorators import idempotent
 
 bp = Blueprint('transaction', __name__, url_prefix='/api/transactions')
-
-
-def calculate_fee(amount):
-    """Calculate transaction fee (1.5%)"""
-    return round(amount * 0.015, 2)
+logger = logging.getLogger(__name__)
+
+
+def _with_direction(row, user_id):
+    """List row plus is_sent/is_received for the caller"""
+    return {
+        **row,
+        'is_sent': row['sender_id'] == user_id and row['type'] == 'transfer',
+        'is_received': row['receiver_id'] == user_id and row['sender_id'] != user_id and row['type'] == 'transfer'
+    }
+
+
+def _stream_transactions(query, user_id, batch_size=200):
+    """
+    Stream a transaction list as a single JSON document
+    
+    Rows come from a server-side cursor in batches of batch_size and are
+    written as they arrive, so memory stays flat and the client gets the
+    first bytes before the last row is read.
+    
+    Args:
+        query: Select of LIST_COLUMNS rows, already filtered and ordered
+        user_id (int): Current user's id
+        batch_size (int): Rows fetched per round trip
+    
+    Returns:
+        Response: application/json streaming response
+    """
+    def generate():
+        rows = db.session.execute(query.execution_options(yield_per=batch_size)).mappings()
+        yield b'{"success":true,"transactions":['
+        separator = b''
+        for row in rows:
+            # Newline-terminated items are still valid inside a JSON array
+            yield separator + current_app.json.dumps_line(_with_direction(row, user_id))
+            separator = b','
+        yield b']}'
+    
+    return Response(stream_with_context(generate()), mimetype='application/json')
 
 
 @bp.route('/send', methods=['POST'])
 @jwt_required()
+@idempotent
 def send_money():
     """Send money from one wallet to another"""
     try:
@@ -23,48 +65,50 @@ def send_money():
         data = request.get_json()
 
         wallet_id = data.get('wallet_id')  # receiver's wallet ID
-        amount = float(data.get('amount', 0))
+        amount = to_money(data.get('amount', 0))
         note = data.get('note', '')
 
-        print(f"📤 Send Money Request:")
-        print(f"   From User: {current_user_id}")
-        print(f"   To Wallet: {wallet_id}")
-        print(f"   Amount: ${amount}")
-        print(f"   Note: {note}")
+        logger.debug("Send money: user=%s to_wallet=%s amount=%s note=%r",
+                     current_user_id, wallet_id, amount, note)
 
         # Validation
         if not wallet_id or amount <= 0:
             return jsonify({'error': 'Invalid wallet ID or amount'}), 400
 
-        # Get sender's wallet
-        sender_wallet = Wallet.query.filter_by(user_id=current_user_id).first()
+        # Sender and receiver wallets with their owners in one statement.
+        # Both rows stay locked until commit/rollback so concurrent sends
+        # can't double-spend; locking in id order keeps two opposite
+        # transfers from deadlocking.
+        wallets = Wallet.query.options(joinedload(Wallet.user, innerjoin=True)).filter(
+            or_(Wallet.user_id == int(current_user_id), Wallet.wallet_id == wallet_id)
+        ).order_by(Wallet.id).with_for_update(of=Wallet).all()
+        sender_wallet = next((w for w in wallets if w.user_id == int(current_user_id)), None)
+        receiver_wallet = next((w for w in wallets if w.wallet_id == wallet_id), None)
+
         if not sender_wallet:
+            db.session.rollback()
             return jsonify({'error': 'Sender wallet not found'}), 404
-
-        # Get receiver's wallet
-        receiver_wallet = Wallet.query.filter_by(wallet_id=wallet_id).first()
         if not receiver_wallet:
+            db.session.rollback()
             return jsonify({'error': 'Receiver wallet not found'}), 404
 
         # Check if sending to self
         if sender_wallet.wallet_id == receiver_wallet.wallet_id:
+            db.session.rollback()
             return jsonify({'error': 'Cannot send money to yourself'}), 400
 
         # Calculate fee and total
         fee = calculate_fee(amount)
         total_amount = amount + fee
 
-        print(f"💰 Transaction Details:")
-        print(f"   Amount: ${amount}")
-        print(f"   Fee: ${fee}")
-        print(f"   Total: ${total_amount}")
-        print(f"   Sender Balance: ${sender_wallet.balance}")
+        logger.debug("Send money: amount=%s fee=%s total=%s sender_balance=%s",
+                     amount, fee, total_amount, sender_wallet.balance)
 
         # Check balance
         if sender_wallet.balance < total_amount:
-            return jsonify({
-                'error': f'Insufficient balance. You need ${total_amount:.2f} (including ${fee:.2f} fee), but have ${sender_wallet.balance:.2f}'
-            }), 400
+            error = f'Insufficient balance. You need ${total_amount:.2f} (including ${fee:.2f} fee), but have ${sender_wallet.balance:.2f}'
+            db.session.rollback()  # release the wallet locks
+            return jsonify({'error': error}), 400
 
         # Perform transaction
         sender_wallet.balance -= total_amount
@@ -75,7 +119,7 @@ def send_money():
 
         # Create transaction record
         transaction = Transaction(
-            transaction_id=generate_unique_id('TXN'),
+            transaction_id=generate_sortable_id('TXN'),
             sender_id=current_user_id,
             receiver_id=receiver_wallet.user_id,
             amount=amount,
@@ -88,19 +132,16 @@ def send_money():
         )
 
         db.session.add(transaction)
-        db.session.commit()
-
-        print(f"✅ Transaction successful!")
-        print(f"   Transaction ID: {transaction.transaction_id}")
-        print(f"   Sender new balance: ${sender_wallet.balance}")
-        print(f"   Receiver new balance: ${receiver_wallet.balance}")
 
-        send_transaction_notification(transaction, sender_wallet, receiver_wallet)
+        # Sender and receiver were loaded with their wallets
+        sender_user = sender_wallet.user
+        receiver_user = receiver_wallet.user
 
-        # Get receiver user details
-        receiver_user = User.query.get(receiver_wallet.user_id)
+        # Notifications go into the same transaction: one flush, one commit
+        send_transaction_notification(transaction, sender_user, receiver_user, commit=False)
 
-        return jsonify({
+        # Build the response before commit expires the objects it reads
+        response = {
             'success': True,
             'message': f'Successfully sent ${amount:.2f} to {receiver_user.first_name} {receiver_user.last_name}',
             'transaction': {
@@ -112,17 +153,25 @@ def send_money():
                 'fee': fee,
                 'total': total_amount,
                 'sender_new_balance': sender_wallet.balance,
-                'timestamp': transaction.created_at.isoformat()
+                'timestamp': transaction.created_at
             }
-        }), 200
+        }
+        user_ids = (sender_wallet.user_id, receiver_wallet.user_id)
+
+        db.session.commit()
+        invalidate_wallet(*user_ids)
+        invalidate_unread_count(*user_ids)
+        invalidate_admin_stats()
+
+        logger.info("Transfer %s completed", response['transaction']['transaction_id'])
+
+        return jsonify(response), 200
 
     except ValueError:
         return jsonify({'error': 'Invalid amount format'}), 400
     except Exception as e:
         db.session.rollback()
-        print(f"❌ Error in send_money: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in send_money")
         return jsonify({'error': str(e)}), 500
 
 
@@ -133,68 +182,70 @@ def get_transactions():
     try:
         current_user_id = get_jwt_identity()
         transaction_type = request.args.get('type', 'all')
-        limit = int(request.args.get('limit', 50))
-        offset = int(request.args.get('offset', 0))
-
-        # Build query based on type
-        query = Transaction.query
+        limit = qp_limit(50)
+        offset = qp_int('offset', 0)
+        cursor = request.args.get('cursor')
+        stream = request.args.get('stream') == '1'
+
+        # Read plain rows (no ORM instances) with both names joined in
+        sender = aliased(User)
+        receiver = aliased(User)
+        query = select(
+            *LIST_COLUMNS,
+            (sender.first_name + ' ' + sender.last_name).label('sender_name'),
+            (receiver.first_name + ' ' + receiver.last_name).label('receiver_name')
+        ).outerjoin(sender, sender.id == Transaction.sender_id) \
+            .outerjoin(receiver, receiver.id == Transaction.receiver_id)
         
         if transaction_type == 'sent':
-            query = query.filter(
+            query = query.where(
                 Transaction.sender_id == current_user_id,
                 Transaction.type == 'transfer'
             )
         elif transaction_type == 'received':
-            query = query.filter(
+            query = query.where(
                 Transaction.receiver_id == current_user_id,
                 Transaction.sender_id != current_user_id,
                 Transaction.type == 'transfer'
             )
         else:
             # All transactions (sent, received, deposits, withdrawals)
-            query = query.filter(
+            query = query.where(
                 (Transaction.sender_id == current_user_id) |
                 (Transaction.receiver_id == current_user_id)
             )
 
-        transactions = query.order_by(Transaction.created_at.desc()) \
-            .limit(limit).offset(offset).all()
+        query = query.order_by(Transaction.created_at.desc(), Transaction.id.desc())
+        if cursor:
+            # Keyset page after the previous page's last row
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+            query = query.where(tuple_(Transaction.created_at, Transaction.id) < (cursor_created_at, cursor_id))
+        else:
+            query = query.offset(offset)
+
+        user_id = int(current_user_id)
 
-        # Get all unique user IDs
-        user_ids = set()
-        for t in transactions:
-            if t.sender_id:
-                user_ids.add(t.sender_id)
-            if t.receiver_id:
-                user_ids.add(t.receiver_id)
+        # Full history: stream every match instead of one page
+        if stream:
+            return _stream_transactions(query, user_id)
         
-        # Fetch all users at once
-        users = User.query.filter(User.id.in_(user_ids)).all()
-        user_dict = {u.id: u for u in users}
+        rows = db.session.execute(query.limit(limit)).mappings().all()
+        next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['id']) if len(rows) == limit else None
 
         # Build transaction list with names
-        transactions_list = []
-        for t in transactions:
-            sender = user_dict.get(t.sender_id)
-            receiver = user_dict.get(t.receiver_id)
-
-            t_data = t.to_dict()
-            t_data.update({
-                'sender_name': f"{sender.first_name} {sender.last_name}" if sender else None,
-                'receiver_name': f"{receiver.first_name} {receiver.last_name}" if receiver else None,
-                'is_sent': t.sender_id == current_user_id and t.type == 'transfer',
-                'is_received': t.receiver_id == current_user_id and t.sender_id != current_user_id and t.type == 'transfer'
-            })
-            transactions_list.append(t_data)
+        transactions_list = [_with_direction(row, user_id) for row in rows]
 
         return jsonify({
             'success': True,
             'transactions': transactions_list,
-            'count': len(transactions_list)
+            'count': len(transactions_list),
+            'next_cursor': next_cursor
         }), 200
 
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        print(f"Error in get_transactions: {str(e)}")
+        logger.exception("Error in get_transactions")
         return jsonify({'error': str(e)}), 500
 
 
@@ -203,8 +254,10 @@ def get_transactions():
 def get_transaction(transaction_id):
     """Get specific transaction"""
     try:
-        current_user_id = get_jwt_identity()
-        transaction = Transaction.query.filter_by(transaction_id=transaction_id).first()
+        # Identity is a string; the sender/receiver ids are ints
+        current_user_id = int(get_jwt_identity())
+        # Transaction with sender and receiver joined in, one statement
+        transaction = get_transaction_with_parties(transaction_id)
 
         if not transaction:
             return jsonify({'error': 'Transaction not found'}), 404
@@ -213,16 +266,14 @@ def get_transaction(transaction_id):
         if transaction.sender_id != current_user_id and transaction.receiver_id != current_user_id:
             return jsonify({'error': 'Unauthorized'}), 403
 
-        # Get sender and receiver
-        sender = User.query.get(transaction.sender_id)
-        receiver = User.query.get(transaction.receiver_id)
+        sender = transaction.sender
+        receiver = transaction.receiver
 
-        transaction_data = transaction.to_dict()
+        # Same is_sent/is_received rules as the list endpoint
+        transaction_data = _with_direction(transaction.to_dict(), current_user_id)
         transaction_data.update({
             'sender_name': f"{sender.first_name} {sender.last_name}" if sender else None,
-            'receiver_name': f"{receiver.first_name} {receiver.last_name}" if receiver else None,
-            'is_sent': transaction.sender_id == current_user_id,
-            'is_received': transaction.receiver_id == current_user_id
+            'receiver_name': f"{receiver.first_name} {receiver.last_name}" if receiver else None
         })
 
         return jsonify({
@@ -231,5 +282,5 @@ def get_transaction(transaction_id):
         }), 200
 
     except Exception as e:
-        print(f"Error in get_transaction: {str(e)}")
+        logger.exception("Error in get_transaction")
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
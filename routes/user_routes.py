@@ -1,10 +1,16 @@
+import logging
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from __init__ import db
+from extensions import db
 from models import User
+from models.user import LIST_COLUMNS as USER_LIST_COLUMNS
+from sqlalchemy import select
 from datetime import datetime
+from utils.decorators import get_request_user
+from utils.cache_helpers import get_or_set, USER_DIRECTORY_KEY, invalidate_user_directory
 
 bp = Blueprint('user', __name__, url_prefix='/api/users')
+logger = logging.getLogger(__name__)
 
 
 @bp.route('/profile', methods=['GET', 'PUT'])
@@ -12,8 +18,7 @@ bp = Blueprint('user', __name__, url_prefix='/api/users')
 def user_profile():
     """Get or update user profile"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = get_request_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -38,6 +43,7 @@ def user_profile():
         
         user.updated_at = datetime.utcnow()
         db.session.commit()
+        invalidate_user_directory()
         
         return jsonify({
             'success': True,
@@ -47,7 +53,7 @@ def user_profile():
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error in user_profile: {str(e)}")
+        logger.exception("Error in user_profile")
         return jsonify({'error': str(e)}), 500
 
 
@@ -56,8 +62,7 @@ def user_profile():
 def change_password():
     """Change user password"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = get_request_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -84,28 +89,32 @@ def change_password():
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error in change_password: {str(e)}")
+        logger.exception("Error in change_password")
         return jsonify({'error': str(e)}), 500
 
 
+def _load_user_directory():
+    """All active users, to_dict columns only"""
+    return [dict(u) for u in db.session.execute(
+        select(*USER_LIST_COLUMNS).where(User.status == 'active')
+    ).mappings()]
+
+
 @bp.route('', methods=['GET'])
 @jwt_required()
 def get_all_users():
     """Get all users (for sending money)"""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         
-        # Get all active users except current user
-        users = User.query.filter(
-            User.id != current_user_id,
-            User.status == 'active'
-        ).all()
+        # One shared list of active users; the caller is filtered out here
+        users = get_or_set(USER_DIRECTORY_KEY, _load_user_directory, policy='directory')
         
         return jsonify({
             'success': True,
-            'users': [u.to_dict() for u in users]
+            'users': [u for u in users if u['id'] != current_user_id]
         }), 200
         
     except Exception as e:
-        print(f"Error in get_all_users: {str(e)}")
+        logger.exception("Error in get_all_users")
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
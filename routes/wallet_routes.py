@@ -1,17 +1,33 @@
+import logging
+import threading
+import orjson
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
-from __init__ import db
+from extensions import db
+from sqlalchemy import select, update, bindparam
 from models import Wallet, Transaction, User
-from utils.helpers import generate_unique_id
+from utils.helpers import generate_sortable_id, to_money
+from utils.cache_helpers import get_or_set, wallet_key, invalidate_wallet, invalidate_admin_stats
 import os
 from utils.notification_helpers import send_deposit_notification
+from utils.decorators import idempotent
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
 bp = Blueprint('wallet', __name__, url_prefix='/api/wallet')
+logger = logging.getLogger(__name__)
+
+# Hot lookups built once at import; requests only bind new values, so the
+# compiled SQL is always a statement-cache hit
+_WALLET_BY_USER = select(Wallet).where(Wallet.user_id == bindparam('user_id'))
+_TRANSACTION_BY_REFERENCE = select(Transaction).where(Transaction.transaction_id == bindparam('reference'))
+_DEPOSIT_BY_REFERENCE = select(Transaction, Wallet) \
+    .outerjoin(Wallet, Wallet.user_id == Transaction.sender_id) \
+    .where(Transaction.transaction_id == bindparam('reference'))
 
 # Pesapal Configuration - Keep your original variable names
 PESAPAY_BASE_URL = os.getenv("PESAPAY_BASE_URL")
@@ -22,6 +38,102 @@ PESAPAY_CALLBACK_URL = os.getenv("PESAPAY_CALLBACK_URL")
 
 # Token cache to avoid requesting new token on every request
 _token_cache = {'token': None, 'expires_at': None}
+# Only one thread refreshes an expired token; the others wait and reuse it
+_token_lock = threading.Lock()
+
+# Shared HTTP session: TLS connections to Pesapal are kept alive and reused.
+# Callers send orjson-encoded bodies, so the JSON content type is set here.
+# Gateway errors are retried briefly; urllib3 only retries idempotent
+# methods, so an order POST is never submitted twice.
+_http = requests.Session()
+_http.headers.update({
+    "Content-Type": "application/json",
+    "Accept": "application/json"
+})
+_http.mount('https://', HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504], raise_on_status=False)
+))
+
+def _wallet_for_user(user_id):
+    """A user's wallet, or None"""
+    return db.session.execute(_WALLET_BY_USER, {'user_id': int(user_id)}).scalar_one_or_none()
+
+
+def _transaction_by_reference(reference):
+    """Transaction by its public ID (Pesapal merchant reference), or None"""
+    return db.session.execute(_TRANSACTION_BY_REFERENCE, {'reference': reference}).scalar_one_or_none()
+
+
+def _deposit_by_reference(reference):
+    """
+    Deposit transaction and the depositor's wallet in one round trip
+    
+    Args:
+        reference (str): Public transaction ID (Pesapal merchant reference)
+    
+    Returns:
+        tuple: (Transaction, Wallet); the wallet is None if the user has
+            none, both are None if the reference is unknown
+    """
+    row = db.session.execute(_DEPOSIT_BY_REFERENCE, {'reference': reference}).one_or_none()
+    return tuple(row) if row else (None, None)
+
+
+def _complete_deposit(transaction, amount, **values):
+    """
+    Mark a deposit completed and credit its wallet, at most once
+    
+    The status change is a conditional UPDATE, so when an IPN and a status
+    poll race only one of them matches and credits; the credit adds to the
+    balance in SQL instead of writing back a balance read earlier.
+    
+    Args:
+        transaction (Transaction): The deposit
+        amount (Decimal): Amount to credit (and record on the transaction)
+        **values: Other Transaction columns to set (note, merchant_request_id)
+    
+    Returns:
+        bool: True if this call completed the deposit
+    """
+    now = datetime.utcnow()
+    claimed = db.session.execute(
+        update(Transaction)
+        .where(Transaction.id == transaction.id, Transaction.status != 'completed')
+        .values(status='completed', amount=amount, updated_at=now, **values)
+    ).rowcount
+    if not claimed:
+        return False
+    
+    db.session.execute(
+        update(Wallet)
+        .where(Wallet.user_id == transaction.sender_id)
+        .values(balance=Wallet.balance + amount, updated_at=now)
+    )
+    return True
+
+
+def _fail_deposit(transaction, **values):
+    """
+    Mark a deposit failed, at most once
+    
+    Conditional UPDATE like _complete_deposit; a deposit that was already
+    credited is left completed.
+    
+    Args:
+        transaction (Transaction): The deposit
+        **values: Other Transaction columns to set (note, merchant_request_id)
+    
+    Returns:
+        bool: True if this call failed the deposit
+    """
+    return bool(db.session.execute(
+        update(Transaction)
+        .where(Transaction.id == transaction.id, Transaction.status.notin_(('failed', 'completed')))
+        .values(status='failed', updated_at=datetime.utcnow(), **values)
+    ).rowcount)
+
 
 limiter = Limiter(
     key_func=get_remote_address,
@@ -34,9 +146,24 @@ def get_pesapal_token():
     Caches token to avoid unnecessary API calls (tokens expire after ~5 minutes)
     """
     # Return cached token if still valid
+    token = _cached_token()
+    if token:
+        return token
+    
+    with _token_lock:
+        # Another thread may have refreshed it while this one waited
+        return _cached_token() or _request_pesapal_token()
+
+
+def _cached_token():
+    """The cached Pesapal token, or None if missing or expired"""
     if _token_cache['token'] and _token_cache['expires_at'] and _token_cache['expires_at'] > datetime.utcnow():
         return _token_cache['token']
-    
+    return None
+
+
+def _request_pesapal_token():
+    """Request a fresh token from Pesapal and cache it (caller holds _token_lock)"""
     try:
         auth_url = f"{PESAPAY_BASE_URL}/Auth/RequestToken"
         
@@ -45,24 +172,19 @@ def get_pesapal_token():
             "consumer_secret": PESAPAY_API_SECRET
         }
         
-        headers = {
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        }
-        
-        print(f"🔑 Requesting new Pesapal token from: {auth_url}")
+        logger.debug("Requesting new Pesapal token from %s", auth_url)
         
-        response = requests.post(auth_url, json=payload, headers=headers, timeout=30)
+        response = _http.post(auth_url, data=orjson.dumps(payload), timeout=30)
         
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             token = data.get('token')
             
             if token:
                 # Cache token for 4 minutes (expires after 5)
                 _token_cache['token'] = token
                 _token_cache['expires_at'] = datetime.utcnow() + timedelta(minutes=4)
-                print(f"✅ Token acquired and cached")
+                logger.debug("Pesapal token acquired and cached")
                 return token
             else:
                 raise Exception("Token not found in response")
@@ -70,11 +192,12 @@ def get_pesapal_token():
             raise Exception(f"Token request failed: {response.status_code} - {response.text}")
             
     except Exception as e:
-        print(f"❌ Failed to get Pesapal token: {str(e)}")
+        logger.exception("Failed to get Pesapal token")
         raise
 
 @bp.route('/deposit', methods=['POST'])
 @jwt_required()
+@idempotent
 def pesapay_deposit():
     """
     Initiate Pesapal payment
@@ -83,20 +206,18 @@ def pesapay_deposit():
     try:
         current_user_id = get_jwt_identity()
         data = request.get_json()
-        print(f"📥 Received Pesapal deposit request: {data}")
+        logger.debug("Pesapal deposit request: %s", data)
         
-        amount = float(data.get('amount', 0))
+        amount = to_money(data.get('amount', 0))
         phone = data.get('phone')
         email = data.get('email', '')
         currency = data.get('currency', 'KES')
-        
-        print(f"💰 Amount: {amount}, 📱 Phone: {phone}, 📧 Email: {email}, 👤 User ID: {current_user_id}")
 
         if amount <= 0:
             return jsonify({'error': 'Invalid amount'}), 400
 
         # Get user's wallet
-        wallet = Wallet.query.filter_by(user_id=current_user_id).first()
+        wallet = _wallet_for_user(current_user_id)
         if not wallet:
             return jsonify({'error': 'Wallet not found'}), 404
 
@@ -104,13 +225,13 @@ def pesapay_deposit():
         token = get_pesapal_token()
         
         # Generate unique transaction reference (merchant reference)
-        transaction_reference = generate_unique_id('PESAPAY')
+        transaction_reference = generate_sortable_id('PESAPAY')
         
         # Prepare Pesapal v3 payment request
         payload = {
             "id": transaction_reference,
             "currency": currency,
-            "amount": amount,
+            "amount": float(amount),
             "description": f"Wallet deposit - {transaction_reference}",
             "callback_url": PESAPAY_CALLBACK_URL,
             "notification_id": PESAPAY_IPN_ID,
@@ -130,26 +251,20 @@ def pesapay_deposit():
             }
         }
 
-        headers = {
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-            "Authorization": f"Bearer {token}"
-        }
+        headers = {"Authorization": f"Bearer {token}"}
 
         payment_url = f"{PESAPAY_BASE_URL}/Transactions/SubmitOrderRequest"
         
-        print(f"🔗 Sending request to Pesapal: {payment_url}")
-        print(f"📦 Payload: {json.dumps(payload, indent=2)}")
+        logger.debug("Pesapal order request to %s: %s", payment_url, payload)
 
-        response = requests.post(payment_url, json=payload, headers=headers, timeout=30)
+        response = _http.post(payment_url, data=orjson.dumps(payload), headers=headers, timeout=30)
         
-        print(f"🔍 Pesapal Response Status: {response.status_code}")
-        print(f"🔍 Pesapal Response Text: {response.text}")
+        logger.debug("Pesapal order response %s: %s", response.status_code, response.text)
 
         try:
-            response_data = response.json()
+            response_data = orjson.loads(response.content)
         except Exception as e:
-            print(f"❌ JSON decode failed: {str(e)}")
+            logger.exception("JSON decode failed")
             return jsonify({'error': 'Invalid response from Pesapal', 'raw': response.text}), 500
 
         if response.status_code == 200 and response_data.get('status') == '200':
@@ -162,7 +277,7 @@ def pesapay_deposit():
                 sender_id=current_user_id,
                 receiver_id=current_user_id,
                 amount=amount,
-                fee=0.0,
+                fee=0,
                 total_amount=amount,
                 type='pesapay_deposit',
                 status='pending',
@@ -174,7 +289,7 @@ def pesapay_deposit():
             db.session.add(pending_transaction)
             db.session.commit()
             
-            print(f"✅ Pending transaction created: {pending_transaction.transaction_id}")
+            logger.info("Pending Pesapal deposit %s created", pending_transaction.transaction_id)
             
             return jsonify({
                 'success': True,
@@ -187,22 +302,20 @@ def pesapay_deposit():
         else:
             error_message = response_data.get('message', 'Payment initiation failed')
             error_details = response_data.get('error', {})
-            print(f"❌ Pesapal error: {error_message}")
+            logger.warning("Pesapal order rejected: %s", error_message)
             return jsonify({
                 'error': error_message,
                 'details': error_details
             }), 400
 
     except requests.exceptions.Timeout:
-        print("❌ Pesapal API timeout")
+        logger.warning("Pesapal API timeout")
         return jsonify({'error': 'Payment service timeout. Please try again.'}), 408
     except requests.exceptions.ConnectionError:
-        print("❌ Pesapal API connection error")
+        logger.warning("Pesapal API connection error")
         return jsonify({'error': 'Cannot connect to payment service. Please try again.'}), 503
     except Exception as e:
-        print(f"❌ Error in pesapay_deposit: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in pesapay_deposit")
         return jsonify({'error': str(e)}), 500
 
 @bp.route('/pesapay-callback', methods=['POST', 'GET'])
@@ -217,12 +330,11 @@ def pesapay_callback():
         order_tracking_id = request.args.get('OrderTrackingId')
         merchant_reference = request.args.get('OrderMerchantReference')
         
-        print(f"📥 Pesapal IPN received:")
-        print(f"   OrderTrackingId: {order_tracking_id}")
-        print(f"   OrderMerchantReference: {merchant_reference}")
+        logger.debug("Pesapal IPN: OrderTrackingId=%s OrderMerchantReference=%s",
+                     order_tracking_id, merchant_reference)
         
         if not order_tracking_id or not merchant_reference:
-            print("❌ Missing required parameters")
+            logger.warning("Pesapal IPN missing required parameters")
             return jsonify({"status": "error", "message": "Missing parameters"}), 400
 
         # Get transaction status from Pesapal API
@@ -230,58 +342,42 @@ def pesapay_callback():
         status_url = f"{PESAPAY_BASE_URL}/Transactions/GetTransactionStatus"
         
         params = {"orderTrackingId": order_tracking_id}
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        }
+        headers = {"Authorization": f"Bearer {token}"}
         
-        print(f"🔍 Checking transaction status with Pesapal...")
-        response = requests.get(status_url, params=params, headers=headers, timeout=30)
+        response = _http.get(status_url, params=params, headers=headers, timeout=30)
         
-        print(f"🔍 Status Response: {response.status_code}")
-        print(f"🔍 Status Data: {response.text}")
+        logger.debug("Pesapal status response %s: %s", response.status_code, response.text)
         
         if response.status_code != 200:
-            print(f"❌ Failed to get status from Pesapal")
+            logger.warning("Failed to get status from Pesapal for %s", order_tracking_id)
             return jsonify({"status": "error", "message": "Failed to verify payment"}), 500
             
-        status_data = response.json()
+        status_data = orjson.loads(response.content)
         
         # FIX: Handle both payment_status_code and payment_status_description
         payment_status_code = status_data.get('payment_status_code')
         payment_status_description = status_data.get('payment_status_description', '').upper()
-        amount = float(status_data.get('amount', 0))
+        amount = to_money(status_data.get('amount', 0))
         currency = status_data.get('currency')
         payment_method = status_data.get('payment_method')
         status_code = status_data.get('status_code')  # This might be the actual status code
         
-        print(f"🔍 Payment Details:")
-        print(f"   Status Code: {payment_status_code}")
-        print(f"   Status Description: {payment_status_description}")
-        print(f"   Status Code (alt): {status_code}")
-        print(f"   Amount: {amount} {currency}")
-        print(f"   Payment Method: {payment_method}")
+        logger.debug("Pesapal payment: status_code=%s description=%s status_code(alt)=%s amount=%s %s method=%s",
+                     payment_status_code, payment_status_description, status_code, amount, currency, payment_method)
 
-        # Find the transaction by transaction_id (which is the merchant_reference)
-        transaction = Transaction.query.filter_by(
-            transaction_id=merchant_reference
-        ).first()
+        # Find the transaction by transaction_id (which is the merchant_reference),
+        # joined to the depositor's wallet
+        transaction, wallet = _deposit_by_reference(merchant_reference)
 
         if not transaction:
-            print(f"⚠️ No transaction found for reference: {merchant_reference}")
+            logger.warning("No transaction found for Pesapal reference %s", merchant_reference)
             # Still return 200 to Pesapal so they don't retry
             return jsonify({"status": "ok", "message": "Transaction not found or already processed"}), 200
 
-        # Get the user's wallet
-        wallet = Wallet.query.filter_by(user_id=transaction.sender_id).first()
-        
         if not wallet:
-            print(f"❌ Wallet not found for user_id: {transaction.sender_id}")
-            transaction.status = 'failed'
-            transaction.note = 'Wallet not found'
-            transaction.updated_at = datetime.utcnow()
-            db.session.commit()
+            logger.error("Wallet not found for user_id %s", transaction.sender_id)
+            if _fail_deposit(transaction, note='Wallet not found'):
+                db.session.commit()
             return jsonify({"status": "error", "message": "Wallet not found"}), 404
 
         # FIX: Determine payment status using multiple fields
@@ -302,51 +398,40 @@ def pesapay_callback():
         
         # Process based on payment status
         if is_completed:
-            print("✅ Payment successful!")
-            
-            # Only update if not already completed
-            if transaction.status != 'completed':
-                # Update wallet balance
-                wallet.balance += amount
-                wallet.updated_at = datetime.utcnow()
-                
-                # Update transaction status
-                transaction.status = 'completed'
-                transaction.amount = amount  # Update with actual amount from Pesapal
-                transaction.note = f'Pesapal deposit successful - TXN: {order_tracking_id} via {payment_method}'
-                transaction.merchant_request_id = order_tracking_id
-                transaction.updated_at = datetime.utcnow()
-                
+            # Credit with the actual amount from Pesapal, unless already completed
+            if _complete_deposit(
+                transaction, amount,
+                note=f'Pesapal deposit successful - TXN: {order_tracking_id} via {payment_method}',
+                merchant_request_id=order_tracking_id
+            ):
                 db.session.commit()
+                invalidate_wallet(wallet.user_id)
+                invalidate_admin_stats()
                 
                 # Send success notification
                 send_deposit_notification(wallet, amount, status='success')
                 
-                print(f"✅ Wallet updated! New balance: {wallet.balance}")
-                print(f"✅ Transaction {transaction.transaction_id} marked as completed")
+                logger.info("Pesapal deposit %s completed", merchant_reference)
             else:
-                print("ℹ️ Transaction already completed")
+                logger.debug("Pesapal deposit %s already completed", merchant_reference)
             
         elif is_failed:
-            print(f"❌ Payment failed")
-            
-            if transaction.status != 'failed':
-                transaction.status = 'failed'
-                transaction.note = f'Pesapal deposit failed - Status: {payment_status_description}, Method: {payment_method}'
-                transaction.merchant_request_id = order_tracking_id
-                transaction.updated_at = datetime.utcnow()
-                
+            if _fail_deposit(
+                transaction,
+                note=f'Pesapal deposit failed - Status: {payment_status_description}, Method: {payment_method}',
+                merchant_request_id=order_tracking_id
+            ):
                 db.session.commit()
                 
                 # Send failure notification
                 send_deposit_notification(wallet, amount, status='failed')
                 
-                print(f"❌ Transaction {transaction.transaction_id} marked as failed")
+                logger.info("Pesapal deposit %s failed", merchant_reference)
             else:
-                print("ℹ️ Transaction already marked as failed")
+                logger.debug("Pesapal deposit %s already failed or completed", merchant_reference)
         
         else:
-            print(f"⚠️ Payment still processing - Status: {payment_status_description}")
+            logger.debug("Pesapal deposit %s still processing: %s", transaction.transaction_id, payment_status_description)
             # Update transaction note with current status but don't change status
             transaction.note = f'Payment processing - {payment_status_description}'
             transaction.merchant_request_id = order_tracking_id
@@ -358,9 +443,7 @@ def pesapay_callback():
 
     except Exception as e:
         db.session.rollback()
-        print(f"❌ Callback error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Callback error")
         # Still return 200 to prevent Pesapal retries
         return jsonify({"status": "error", "message": "Internal server error"}), 200
 
@@ -374,14 +457,10 @@ def check_payment_status(reference):
     try:
         current_user_id = get_jwt_identity()
         
-        print(f"🔍 Checking payment status for reference: {reference}")
-        print(f"👤 User ID: {current_user_id}")
-        
         # Find the transaction by transaction_id
-        transaction = Transaction.query.filter_by(transaction_id=reference).first()
+        transaction = _transaction_by_reference(reference)
         
         if not transaction:
-            print(f"❌ Transaction not found for reference: {reference}")
             return jsonify({
                 'success': False,
                 'error': 'Transaction not found'
@@ -402,35 +481,30 @@ def check_payment_status(reference):
                 
                 # If Pesapal shows completed but our DB shows pending, update it
                 if pesapal_status == 1 and transaction.status == 'pending':
-                    wallet = Wallet.query.filter_by(user_id=current_user_id).first()
-                    if wallet:
-                        wallet.balance += transaction.amount
-                        wallet.updated_at = datetime.utcnow()
-                        
-                        transaction.status = 'completed'
-                        transaction.note = f'Pesapal deposit completed (verified via status check)'
-                        transaction.updated_at = datetime.utcnow()
-                        
+                    wallet = _wallet_for_user(current_user_id)
+                    amount = transaction.amount
+                    if wallet and _complete_deposit(
+                        transaction, amount,
+                        note='Pesapal deposit completed (verified via status check)'
+                    ):
                         db.session.commit()
+                        invalidate_wallet(wallet.user_id)
+                        invalidate_admin_stats()
                         
-                        send_deposit_notification(wallet, transaction.amount, status='success')
-                        print(f"✅ Transaction updated to completed via status check")
+                        send_deposit_notification(wallet, amount, status='success')
+                        logger.info("Pesapal deposit %s completed via status check", reference)
                 
                 # If Pesapal shows failed but our DB shows pending, update it
                 elif pesapal_status in [2, 3] and transaction.status == 'pending':
-                    transaction.status = 'failed'
-                    transaction.note = f'Pesapal deposit failed (verified via status check)'
-                    transaction.updated_at = datetime.utcnow()
-                    db.session.commit()
-                    print(f"❌ Transaction updated to failed via status check")
+                    if _fail_deposit(transaction, note='Pesapal deposit failed (verified via status check)'):
+                        db.session.commit()
+                        logger.info("Pesapal deposit %s failed via status check", reference)
                     
             except Exception as e:
-                print(f"⚠️ Could not check Pesapal status: {str(e)}")
+                logger.warning("Could not check Pesapal status: %s", e)
         
-        print(f"✅ Transaction found: {transaction.transaction_id}")
-        print(f"📊 Transaction status: {transaction.status}")
-        if pesapal_status is not None:
-            print(f"📊 Pesapal status code: {pesapal_status}")
+        logger.debug("Payment status %s: %s (Pesapal status code %s)",
+                     transaction.transaction_id, transaction.status, pesapal_status)
         
         return jsonify({
             'success': True,
@@ -441,9 +515,7 @@ def check_payment_status(reference):
         }), 200
         
     except Exception as e:
-        print(f"❌ Error checking payment status: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error checking payment status")
         return jsonify({
             'success': False,
             'error': str(e)
@@ -459,16 +531,12 @@ def check_pesapal_transaction_status(order_tracking_id):
         status_url = f"{PESAPAY_BASE_URL}/Transactions/GetTransactionStatus"
         
         params = {"orderTrackingId": order_tracking_id}
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        }
+        headers = {"Authorization": f"Bearer {token}"}
         
-        response = requests.get(status_url, params=params, headers=headers, timeout=10)
+        response = _http.get(status_url, params=params, headers=headers, timeout=10)
         
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             
             # Use status_code instead of payment_status_code
             status_code = data.get('status_code')
@@ -482,32 +550,44 @@ def check_pesapal_transaction_status(order_tracking_id):
             else:
                 return 0  # INVALID or unknown
         else:
-            print(f"❌ Status check failed: {response.status_code} - {response.text}")
+            logger.warning("Pesapal status check failed: %s - %s", response.status_code, response.text)
             return 0
             
     except Exception as e:
-        print(f"❌ Error checking Pesapal status: {str(e)}")
+        logger.exception("Error checking Pesapal status")
         return 0
 
 # Keep your existing wallet routes unchanged
+def _load_wallet(user_id):
+    """Serialized wallet of a user, or None if they have none"""
+    wallet = _wallet_for_user(user_id)
+    return wallet.to_dict() if wallet else None
+
+
 @bp.route('', methods=['GET'])
 @jwt_required()
 def get_wallet():
     """Get user's wallet"""
     try:
-        current_user_id = get_jwt_identity()
-        wallet = Wallet.query.filter_by(user_id=current_user_id).first()
+        current_user_id = int(get_jwt_identity())
+        
+        # Polled often, changes only when money moves (invalidated there)
+        wallet_data = get_or_set(
+            wallet_key(current_user_id),
+            lambda: _load_wallet(current_user_id),
+            policy='long'
+        )
 
-        if not wallet:
+        if not wallet_data:
             return jsonify({'error': 'Wallet not found'}), 404
 
         return jsonify({
             'success': True,
-            'wallet': wallet.to_dict()
+            'wallet': wallet_data
         }), 200
 
     except Exception as e:
-        print(f"Error in get_wallet: {str(e)}")
+        logger.exception("Error in get_wallet")
         return jsonify({'error': str(e)}), 500
 
 @bp.route('/add-funds', methods=['POST'])
@@ -515,14 +595,10 @@ def get_wallet():
 def add_funds():
     """Add funds to wallet (manual/admin)"""
     try:
-        current_user_id = get_jwt_identity()
-        wallet = Wallet.query.filter_by(user_id=current_user_id).first()
-
-        if not wallet:
-            return jsonify({'error': 'Wallet not found'}), 404
-
+        # Identity is a string; the FK columns and the response use the int
+        user_id = int(get_jwt_identity())
         data = request.get_json()
-        amount = float(data.get('amount', 0))
+        amount = to_money(data.get('amount', 0))
 
         if amount <= 0:
             return jsonify({'error': 'Invalid amount'}), 400
@@ -530,38 +606,54 @@ def add_funds():
         if amount > 10000:
             return jsonify({'error': 'Maximum amount is $10,000'}), 400
 
-        # Add funds to wallet
-        wallet.balance = wallet.balance + amount
-        wallet.updated_at = datetime.utcnow()
+        # Credit in one statement: the database adds to the current balance,
+        # so concurrent credits can't overwrite each other
+        now = datetime.utcnow()
+        wallet = db.session.execute(
+            update(Wallet)
+            .where(Wallet.user_id == user_id)
+            .values(balance=Wallet.balance + amount, updated_at=now)
+            .returning(Wallet)
+        ).scalar()
+        if not wallet:
+            return jsonify({'error': 'Wallet not found'}), 404
 
         # Create transaction record
         transaction = Transaction(
-            transaction_id=generate_unique_id('TXN'),
-            sender_id=current_user_id,
-            receiver_id=current_user_id,
+            transaction_id=generate_sortable_id('TXN'),
+            sender_id=user_id,
+            receiver_id=user_id,
             amount=amount,
-            fee=0.0,
+            fee=0,
             total_amount=amount,
             type='add_funds',
             status='completed',
-            note=data.get('note', 'Added funds to wallet')
+            note=data.get('note', 'Added funds to wallet'),
+            created_at=now,
+            updated_at=now
         )
 
         db.session.add(transaction)
+        db.session.flush()
+        # Serialize before commit expires both objects (no refresh SELECTs)
+        wallet_data = wallet.to_dict()
+        transaction_data = transaction.to_dict()
         db.session.commit()
+        invalidate_wallet(wallet_data['user_id'])
+        invalidate_admin_stats()
 
         return jsonify({
             'success': True,
             'message': 'Funds added successfully',
-            'wallet': wallet.to_dict(),
-            'transaction': transaction.to_dict()
+            'wallet': wallet_data,
+            'transaction': transaction_data
         }), 200
 
     except ValueError:
         return jsonify({'error': 'Invalid amount format'}), 400
     except Exception as e:
         db.session.rollback()
-        print(f"Error in add_funds: {str(e)}")
+        logger.exception("Error in add_funds")
         return jsonify({'error': str(e)}), 500
     
 @bp.route('/chart-data', methods=['GET'])
@@ -572,10 +664,8 @@ def get_chart_data():
         current_user_id = get_jwt_identity()
         time_period = request.args.get('period', 'monthly')  # weekly, monthly, yearly
         
-        print(f"📊 Getting chart data for user {current_user_id}, period: {time_period}")
-        
         # Get user's wallet
-        wallet = Wallet.query.filter_by(user_id=current_user_id).first()
+        wallet = _wallet_for_user(current_user_id)
         if not wallet:
             return jsonify({'error': 'Wallet not found'}), 404
         
@@ -604,7 +694,6 @@ def get_chart_data():
         # Calculate running balance for the period
         chart_data = calculate_running_balance(transactions, current_user_id, wallet.balance, time_period, group_format)
         
-        print(f"✅ Generated {len(chart_data)} data points for {time_period} chart")
         
         return jsonify({
             'success': True,
@@ -613,16 +702,14 @@ def get_chart_data():
         }), 200
         
     except Exception as e:
-        print(f"❌ Error getting chart data: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error getting chart data")
         return jsonify({'error': str(e)}), 500
 
 def calculate_running_balance(transactions, user_id, current_balance, time_period, group_format):
     """Calculate running balance for chart data"""
     if not transactions:
         # Return current balance if no transactions
-        return [{'label': 'Current', 'balance': float(current_balance)}]
+        return [{'label': 'Current', 'balance': current_balance}]
     
     # Sort transactions by date
     transactions.sort(key=lambda x: x.created_at)
@@ -636,10 +723,10 @@ def calculate_running_balance(transactions, user_id, current_balance, time_perio
         # Determine if user sent or received money
         if transaction.sender_id == user_id:
             # User sent money - add back to balance
-            running_balance += float(transaction.amount + transaction.fee)
+            running_balance += transaction.amount + transaction.fee
         elif transaction.receiver_id == user_id:
             # User received money - subtract from balance
-            running_balance -= float(transaction.amount)
+            running_balance -= transaction.amount
         
         # Group by time period
         if time_period == 'weekly':
@@ -659,7 +746,7 @@ def calculate_running_balance(transactions, user_id, current_balance, time_perio
     for label, balance in balance_history.items():
         chart_data.append({
             'label': label,
-            'balance': float(balance)
+            'balance': balance
         })
     
     # Sort by label for proper ordering
@@ -9,5 +9,10 @@ if __name__ == "__main__":
     print("📍 Health check: http://localhost:5000/api/health")
     print("👤 Default admin: admin@example.com / admin123")
     
+    # Local development: make sure tables and the default admin exist
+    from utils.seed import init_db
+    with app.app_context():
+        init_db()
+    
     port = int(os.environ.get("PORT", 5000))
     app.run(host="0.0.0.0", port=port, debug=False)
\ No newline at end of file
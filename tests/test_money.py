@@ -0,0 +1,47 @@
+"""
+Money parsing helpers
+
+Run from the repository root: python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.helpers import to_money, calculate_fee  # noqa: E402
+
+
+class ToMoneyTest(unittest.TestCase):
+
+    def test_rounds_to_cents(self):
+        self.assertEqual(to_money('10.005'), Decimal('10.01'))
+        self.assertEqual(to_money(12.5), Decimal('12.50'))
+        self.assertEqual(to_money(7), Decimal('7.00'))
+
+    def test_rejects_non_numbers(self):
+        for value in ('abc', '', None, [1]):
+            with self.subTest(value=value):
+                self.assertRaises(ValueError, to_money, value)
+
+    def test_rejects_nan_and_infinity(self):
+        for value in ('NaN', 'sNaN', 'Infinity', '-Infinity', float('nan'), float('inf')):
+            with self.subTest(value=value):
+                self.assertRaises(ValueError, to_money, value)
+
+    def test_rejects_huge_amounts(self):
+        for value in ('1e30', '1e400', 1e300, '9' * 40):
+            with self.subTest(value=value):
+                self.assertRaises(ValueError, to_money, value)
+
+
+class CalculateFeeTest(unittest.TestCase):
+
+    def test_fee_is_rounded_to_cents(self):
+        self.assertEqual(calculate_fee(Decimal('10.50')), Decimal('0.16'))
+        self.assertEqual(calculate_fee(Decimal('0.00')), Decimal('0.00'))
+
+
+if __name__ == '__main__':
+    unittest.main()
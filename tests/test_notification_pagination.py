@@ -0,0 +1,94 @@
+"""
+Keyset pagination of GET /api/notifications
+
+Run from the repository root: python -m unittest discover tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_db_fd, _db_path = tempfile.mkstemp(suffix='.db')
+os.close(_db_fd)
+# Read by config at import time, so set before the app is imported
+os.environ['DATABASE_URL'] = f'sqlite:///{_db_path}'
+
+from __init__ import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models.notification import create_notifications_bulk  # noqa: E402
+
+
+class NotificationCursorTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app('testing')
+        with cls.app.app_context():
+            db.create_all()
+        cls.client = cls.app.test_client()
+        
+        cls.client.post('/api/auth/register', json={
+            'first_name': 'Page', 'last_name': 'Walker',
+            'email': 'pages@example.com', 'password': 'secret1'
+        })
+        login = cls.client.post('/api/auth/login', json={
+            'email': 'pages@example.com', 'password': 'secret1'
+        }).get_json()
+        cls.headers = {'Authorization': f"Bearer {login['access_token']}"}
+        
+        # Registration may add a welcome notification; the rest land in the
+        # same second, so ordering relies on the full timestamp and the id
+        with cls.app.app_context():
+            user_id = login['user']['id']
+            create_notifications_bulk([
+                {'user_id': user_id, 'title': f'N{i}', 'message': 'm', 'type': 'system'}
+                for i in range(7)
+            ])
+            create_notifications_bulk([
+                {'user_id': user_id, 'title': f'R{i}', 'message': 'm', 'type': 'system', 'is_read': i % 2 == 0}
+                for i in range(5)
+            ])
+
+    @classmethod
+    def tearDownClass(cls):
+        with cls.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.remove(_db_path)
+
+    def _walk(self, query):
+        """Follow next_cursor from the first page to the last, collecting ids"""
+        seen = []
+        cursor = None
+        for _ in range(50):
+            url = f'/api/notifications?{query}limit=2' + (f'&cursor={cursor}' if cursor else '')
+            response = self.client.get(url, headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            data = response.get_json()
+            seen.extend(n['id'] for n in data['notifications'])
+            cursor = data['next_cursor']
+            if not cursor:
+                return seen
+        self.fail('Cursor paging did not terminate')
+
+    def _all_ids(self, query):
+        data = self.client.get(f'/api/notifications?{query}limit=200', headers=self.headers).get_json()
+        return [n['id'] for n in data['notifications']]
+
+    def test_every_row_appears_exactly_once(self):
+        for query in ('', 'unread_only=true&'):
+            with self.subTest(query=query):
+                seen = self._walk(query)
+                self.assertEqual(len(seen), len(set(seen)))
+                self.assertEqual(seen, self._all_ids(query))
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get('/api/notifications?cursor=not-a-cursor', headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
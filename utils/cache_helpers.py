@@ -0,0 +1,234 @@
+"""
+Response caching helpers
+"""
+import hashlib
+import logging
+from extensions import cache
+
+logger = logging.getLogger(__name__)
+
+# Per-endpoint cache policies (seconds)
+CACHE_TIMEOUTS = {
+    'short': 5,
+    'normal': 30,
+    'long': 60,
+    # Rarely-changing lists, dropped explicitly when they change
+    'directory': 300,
+    # Rendered documents, keyed on their content so they never go stale
+    'document': 3600
+}
+
+# The 'last_known:' fallback copy outlives its entry by this factor: long
+# enough to ride out an outage, short enough that per-user and per-filter
+# keys don't pile up forever
+STALE_TIMEOUT_FACTOR = 20
+
+
+# Admin wallet aggregates shared by /admin/wallets and /admin/stats
+WALLET_OVERVIEW_KEY = 'admin:wallet_overview'
+
+# Active users offered as transfer recipients (GET /api/users)
+USER_DIRECTORY_KEY = 'users:directory'
+
+# ?period= values of /admin/stats, each cached separately
+STATS_PERIODS = ('today', 'week', 'month', 'year', 'all')
+
+# How long a money-moving response is replayed for its Idempotency-Key
+IDEMPOTENCY_TIMEOUT = 600
+_IDEMPOTENCY_PENDING = 'pending'
+
+
+def unread_count_key(user_id):
+    """Cache key for a user's unread notification count"""
+    return f"notif:unread:{user_id}"
+
+
+def wallet_key(user_id):
+    """Cache key for a user's serialized wallet"""
+    return f"wallet:{user_id}"
+
+
+def admin_stats_key(period):
+    """Cache key for the admin statistics of one period"""
+    return f"admin:stats:{period}"
+
+
+def idempotency_key(user_id, client_key):
+    """Cache key for a client-supplied Idempotency-Key, scoped to the user"""
+    return f"idem:{user_id}:{client_key}"
+
+
+def receipt_key(transaction_id, fingerprint):
+    """
+    Cache key for a rendered transaction receipt PDF
+    
+    Args:
+        transaction_id (str): Public transaction ID
+        fingerprint (tuple): Anything that changes the receipt's content
+    
+    Returns:
+        str: Cache key
+    """
+    digest = hashlib.blake2b(repr(fingerprint).encode(), digest_size=16).hexdigest()
+    return f"receipt:{transaction_id}:{digest}"
+
+
+def statement_key(wallet_id, period, fingerprint):
+    """
+    Cache key for a rendered wallet statement PDF
+    
+    Args:
+        wallet_id (str): Wallet the statement is for
+        period (str): Statement period ('month', '3months', ...)
+        fingerprint (tuple): Anything that changes the statement's content
+    
+    Returns:
+        str: Cache key
+    """
+    digest = hashlib.blake2b(repr(fingerprint).encode(), digest_size=16).hexdigest()
+    return f"statement:{wallet_id}:{period}:{digest}"
+
+
+def _cache_get(key):
+    """cache.get that treats an unreachable cache backend as a miss"""
+    try:
+        return cache.get(key)
+    except Exception as e:
+        logger.warning("Cache get failed for %s: %s", key, e)
+        return None
+
+
+def _cache_set(key, value, timeout):
+    """cache.set that ignores an unreachable cache backend"""
+    try:
+        cache.set(key, value, timeout=timeout)
+    except Exception as e:
+        logger.warning("Cache set failed for %s: %s", key, e)
+
+
+def _cache_delete(*keys):
+    """cache.delete_many that ignores an unreachable cache backend"""
+    try:
+        cache.delete_many(*keys)
+    except Exception as e:
+        logger.warning("Cache delete failed for %s: %s", ', '.join(keys), e)
+
+
+def get_or_set(key, loader, policy='normal', fallback=True):
+    """
+    Return the cached value for key, computing it with loader on a miss
+    
+    The last computed value is also kept under 'last_known:<key>' for
+    STALE_TIMEOUT_FACTOR times the policy timeout, and served if loader
+    fails (e.g. database outage). Pass fallback=False for values that are
+    cheap to lose and costly to keep, such as rendered documents.
+    If the cache backend itself is down, the loader runs every time.
+    
+    Args:
+        key (str): Cache key
+        loader (callable): Computes the value on a cache miss
+        policy (str): Key of CACHE_TIMEOUTS
+        fallback (bool): Keep and serve the 'last_known:' copy
+    
+    Returns:
+        Cached or freshly computed value
+    """
+    value = _cache_get(key)
+    if value is not None:
+        return value
+    
+    if not fallback:
+        value = loader()
+        _cache_set(key, value, CACHE_TIMEOUTS[policy])
+        return value
+    
+    try:
+        value = loader()
+    except Exception:
+        stale = _cache_get(f"last_known:{key}")
+        if stale is None:
+            raise
+        return stale
+    
+    timeout = CACHE_TIMEOUTS[policy]
+    _cache_set(key, value, timeout)
+    _cache_set(f"last_known:{key}", value, timeout * STALE_TIMEOUT_FACTOR)
+    return value
+
+
+def set_unread_count(user_id, count):
+    """Store a user's unread count when it is known without a query"""
+    _cache_set(unread_count_key(user_id), count, CACHE_TIMEOUTS['short'])
+
+
+def invalidate_unread_count(*user_ids):
+    """Drop cached unread counts for the given users"""
+    _cache_delete(*[unread_count_key(user_id) for user_id in user_ids])
+
+
+def invalidate_wallet(*user_ids):
+    """Drop cached wallets after their balance or status changes"""
+    _cache_delete(*[wallet_key(user_id) for user_id in user_ids])
+
+
+def invalidate_user_directory():
+    """Drop the cached user directory after a user is created, edited or removed"""
+    _cache_delete(USER_DIRECTORY_KEY)
+
+
+def invalidate_wallet_overview():
+    """Drop the cached admin wallet aggregates after a wallet is created or adjusted"""
+    _cache_delete(WALLET_OVERVIEW_KEY)
+
+
+def invalidate_admin_stats():
+    """
+    Drop cached admin statistics after money moves
+    
+    The stats are built from the wallet overview, so it goes too;
+    otherwise the recomputed stats would re-cache stale balances.
+    """
+    _cache_delete(WALLET_OVERVIEW_KEY, *[admin_stats_key(period) for period in STATS_PERIODS])
+
+
+def claim_idempotency_key(key):
+    """
+    Reserve an idempotency key for the request now running
+    
+    cache.add only writes a missing key (SETNX on Redis), so of several
+    concurrent retries exactly one gets True.
+    
+    Args:
+        key (str): Key from idempotency_key()
+    
+    Returns:
+        bool: True if this request owns the key. An unreachable cache backend
+            also gives True, so requests still go through without dedupe.
+    """
+    try:
+        return bool(cache.add(key, _IDEMPOTENCY_PENDING, timeout=IDEMPOTENCY_TIMEOUT))
+    except Exception as e:
+        logger.warning("Cache add failed for %s: %s", key, e)
+        return True
+
+
+def get_idempotent_response(key):
+    """
+    Response stored for a claimed idempotency key
+    
+    Returns:
+        tuple or None: (body, status) once the first request succeeded,
+            None while it is still running
+    """
+    value = _cache_get(key)
+    return None if value == _IDEMPOTENCY_PENDING else value
+
+
+def store_idempotent_response(key, body, status):
+    """Keep a successful response for replay to retries of the same key"""
+    _cache_set(key, (body, status), IDEMPOTENCY_TIMEOUT)
+
+
+def release_idempotency_key(key):
+    """Free a key whose request failed, so the client can retry it"""
+    _cache_delete(key)
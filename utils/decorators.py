@@ -2,9 +2,43 @@
 Custom decorators for route protection
 """
 from functools import wraps
-from flask import jsonify
+from flask import Response, request, jsonify, make_response, g
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import User
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+from extensions import db
+from models import User, Wallet
+from utils.cache_helpers import (
+    idempotency_key, claim_idempotency_key, get_idempotent_response,
+    store_idempotent_response, release_idempotency_key
+)
+
+
+def get_request_user(with_wallet=False):
+    """
+    Load the authenticated user once per request
+    
+    Decorators and handlers share the result through flask.g, so a
+    protected route never looks the same user up twice.
+    
+    Args:
+        with_wallet (bool): Join the user's wallet into the same SELECT
+    
+    Returns:
+        User or None: The user for the JWT identity, None if it no longer exists
+    """
+    if 'current_user' not in g:
+        options = [joinedload(User.wallet)] if with_wallet else []
+        g.current_user = db.session.get(User, int(get_jwt_identity()), options=options)
+    
+    user = g.current_user
+    if with_wallet and user is not None and 'wallet' in inspect(user).unloaded:
+        # Cached earlier without the join (e.g. by a decorator): load the
+        # wallet now rather than leaving it to a lazy load in the handler
+        wallet = db.session.scalars(select(Wallet).where(Wallet.user_id == user.id)).first()
+        set_committed_value(user, 'wallet', wallet)
+    return user
 
 
 def admin_required(fn):
@@ -14,8 +48,7 @@ def admin_required(fn):
     @wraps(fn)
     @jwt_required()
     def wrapper(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = get_request_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -23,6 +56,8 @@ def admin_required(fn):
         if user.role != 'admin':
             return jsonify({'error': 'Admin access required'}), 403
         
+        # Reuse the resolved admin in the handler instead of querying again
+        g.current_admin = user
         return fn(*args, **kwargs)
     return wrapper
 
@@ -34,8 +69,7 @@ def active_user_required(fn):
     @wraps(fn)
     @jwt_required()
     def wrapper(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = get_request_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -44,4 +78,44 @@ def active_user_required(fn):
             return jsonify({'error': 'Account is inactive'}), 403
         
         return fn(*args, **kwargs)
-    return wrapper
\ No newline at end of file
+    return wrapper
+
+
+def idempotent(fn):
+    """
+    Decorator to collapse client retries that carry the same Idempotency-Key
+    
+    The first request with a key runs; its 2xx response is kept for
+    IDEMPOTENCY_TIMEOUT seconds and replayed to later requests with that key
+    instead of moving money again. A retry that arrives while the first is
+    still running gets 409. Failed responses free the key. Requests without
+    the header are not affected. Apply below jwt_required().
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        client_key = request.headers.get('Idempotency-Key')
+        if not client_key:
+            return fn(*args, **kwargs)
+        
+        key = idempotency_key(get_jwt_identity(), client_key)
+        if not claim_idempotency_key(key):
+            stored = get_idempotent_response(key)
+            if stored is None:
+                return jsonify({'error': 'A request with this Idempotency-Key is still in progress'}), 409
+            body, status = stored
+            response = Response(body, status=status, mimetype='application/json')
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+        
+        try:
+            response = make_response(fn(*args, **kwargs))
+        except Exception:
+            release_idempotency_key(key)
+            raise
+        
+        if 200 <= response.status_code < 300:
+            store_idempotent_response(key, response.get_data(), response.status_code)
+        else:
+            release_idempotency_key(key)
+        return response
+    return wrapper
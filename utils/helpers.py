@@ -4,7 +4,14 @@ Utility helper functions
 import random
 import string
 import re
+import time
 from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+CENT = Decimal('0.01')
+
+# Transfer fee (1.5%), parsed once rather than on every transfer
+FEE_RATE = Decimal('0.015')
 
 
 def generate_unique_id(prefix, length=10):
@@ -23,18 +30,71 @@ def generate_unique_id(prefix, length=10):
     return f"{prefix}-{random_part}"
 
 
-def calculate_fee(amount, fee_rate=0.015):
+_ID_CHARS = string.digits + string.ascii_uppercase
+
+
+def generate_sortable_id(prefix, length=8):
+    """
+    Generate a unique, time-ordered ID with a prefix
+    
+    The first 9 characters encode the current time in milliseconds (base 36),
+    so IDs sort by creation time and new rows land at the right edge of the
+    unique index instead of at random pages.
+    
+    Args:
+        prefix (str): Prefix for the ID (e.g., 'TXN')
+        length (int): Length of random part
+    
+    Returns:
+        str: Unique ID like 'TXN-0MGAB12CDK7Q2XZ9P'
+    """
+    millis = time.time_ns() // 1_000_000
+    time_part = ''
+    for _ in range(9):
+        millis, digit = divmod(millis, 36)
+        time_part = _ID_CHARS[digit] + time_part
+    random_part = ''.join(random.choices(_ID_CHARS, k=length))
+    return f"{prefix}-{time_part}{random_part}"
+
+
+def to_money(value):
+    """
+    Parse a monetary amount from request data
+    
+    Args:
+        value: Amount as sent by the client (str, int or float)
+    
+    Returns:
+        Decimal: Amount rounded to cents
+    
+    Raises:
+        ValueError: If the value is not a finite number
+    """
+    try:
+        amount = Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {value!r}")
+    if not amount.is_finite():
+        raise ValueError(f"Invalid amount: {value!r}")
+    try:
+        return amount.quantize(CENT, rounding=ROUND_HALF_UP)
+    except InvalidOperation:
+        # More digits than the decimal context holds (e.g. '1e30')
+        raise ValueError(f"Invalid amount: {value!r}")
+
+
+def calculate_fee(amount, fee_rate=FEE_RATE):
     """
     Calculate transaction fee
     
     Args:
-        amount (float): Transaction amount
-        fee_rate (float): Fee rate (default 1.5%)
+        amount (Decimal): Transaction amount
+        fee_rate (Decimal): Fee rate (default 1.5%)
     
     Returns:
-        float: Calculated fee rounded to 2 decimal places
+        Decimal: Calculated fee rounded to cents
     """
-    return round(amount * fee_rate, 2)
+    return (amount * fee_rate).quantize(CENT, rounding=ROUND_HALF_UP)
 
 
 def validate_email(email):
@@ -165,6 +225,40 @@ def get_date_range(period='week'):
     return start_date, end_date
 
 
+def encode_cursor(created_at, row_id):
+    """
+    Build a keyset pagination cursor from the last row of a page
+    
+    Args:
+        created_at (datetime): Row creation time
+        row_id (int): Row primary key (tie-breaker)
+    
+    Returns:
+        str: Cursor like '2024-01-31T12:00:00.123456_42'
+    """
+    return f"{created_at.isoformat()}_{row_id}"
+
+
+def decode_cursor(cursor):
+    """
+    Parse a cursor produced by encode_cursor
+    
+    Args:
+        cursor (str): Cursor from a previous page's next_cursor
+    
+    Returns:
+        tuple: (created_at, row_id)
+    
+    Raises:
+        ValidationError: If the cursor is malformed
+    """
+    try:
+        created_at, row_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except ValueError:
+        raise ValidationError('Invalid cursor')
+
+
 def validate_password_strength(password):
     """
     Validate password strength
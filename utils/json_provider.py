@@ -0,0 +1,42 @@
+"""
+orjson-backed JSON provider for Flask responses
+"""
+from decimal import Decimal
+from flask.json.provider import JSONProvider
+import orjson
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    """Serialize types orjson does not handle natively"""
+    if isinstance(obj, Decimal):
+        # Numeric(12, 2) money columns; clients expect JSON numbers
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    JSON provider using orjson
+
+    datetime objects are written as ISO 8601 strings, so models can hand
+    raw datetimes to jsonify instead of calling isoformat() themselves.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_default, option=_OPTIONS).decode()
+
+    def dumps_line(self, obj):
+        """Encode obj as one NDJSON line (bytes, newline included)"""
+        return orjson.dumps(obj, default=_default, option=_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=_default, option=_OPTIONS),
+            mimetype='application/json'
+        )
@@ -0,0 +1,81 @@
+"""
+Application logging: records are queued on the request thread and written
+by a background listener thread
+"""
+import atexit
+import logging
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+_FORMAT = '%(asctime)s %(levelname)s [%(name)s] %(message)s'
+
+_listener = None
+
+
+class _LocalQueueHandler(QueueHandler):
+    """
+    QueueHandler for an in-process queue
+
+    The stock prepare() formats the message and traceback on the calling
+    thread so the record can be pickled; nothing is pickled here, so the
+    record is queued as-is and formatted by the listener.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class _RateLimitFilter(logging.Filter):
+    """
+    Let through at most `burst` records per message every `window` seconds
+
+    A sustained burst of identical failures (e.g. the database being down)
+    logs a sample instead of one traceback per request.
+    """
+
+    def __init__(self, burst=10, window=60):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self._seen = {}
+
+    def filter(self, record):
+        if record.levelno < logging.ERROR:
+            return True
+        now = time.monotonic()
+        key = (record.name, record.msg)
+        started, count = self._seen.get(key, (now, 0))
+        if now - started >= self.window:
+            started, count = now, 0
+        self._seen[key] = (started, count + 1)
+        return count < self.burst
+
+
+def configure_logging(level=logging.INFO):
+    """
+    Route root logging through a QueueHandler
+
+    Formatting and the stream write happen on the listener thread, so an
+    error path only pays for a queue put. Safe to call more than once.
+
+    Args:
+        level (int): Root logger level
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(_FORMAT))
+
+    queue_handler = _LocalQueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(_RateLimitFilter())
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+
+    _listener = QueueListener(queue_handler.queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
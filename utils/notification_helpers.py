@@ -1,11 +1,14 @@
 """
 Helper functions for sending notifications
 """
-from models.notification import create_notification
-from __init__ import db
+import logging
+from models.notification import create_notification, create_notifications_bulk
+from extensions import db
 
+logger = logging.getLogger(__name__)
 
-def send_transaction_notification(transaction, sender, receiver):
+
+def send_transaction_notification(transaction, sender, receiver, commit=True):
     """
     Send notifications to both sender and receiver for a transaction
     
@@ -13,44 +16,45 @@ def send_transaction_notification(transaction, sender, receiver):
         transaction: Transaction object
         sender: User object (sender)
         receiver: User object (receiver)
+        commit: False to add them to the caller's transaction instead
     """
     try:
-        # Notification for sender
-        sender_notification = create_notification(
-            user_id=sender.id,
-            title="Money Sent Successfully",
-            message=f"You successfully sent ${transaction.amount:.2f} to {receiver.first_name} {receiver.last_name}",
-            notification_type='transaction',
-            link=f'/user/transactions',
-            meta_data={
-                'transaction_id': transaction.transaction_id,
-                'amount': float(transaction.amount),
-                'fee': float(transaction.fee),
-                'total': float(transaction.total_amount),
-                'recipient': f"{receiver.first_name} {receiver.last_name}",
-                'type': 'sent'
-            }
-        )
-        
-        # Notification for receiver
-        receiver_notification = create_notification(
-            user_id=receiver.id,
-            title="Money Received",
-            message=f"You received ${transaction.amount:.2f} from {sender.first_name} {sender.last_name}",
-            notification_type='transaction',
-            link=f'/user/transactions',
-            meta_data={
-                'transaction_id': transaction.transaction_id,
-                'amount': float(transaction.amount),
-                'sender': f"{sender.first_name} {sender.last_name}",
-                'type': 'received'
+        # Both notifications are written with one commit
+        sender_notification, receiver_notification = create_notifications_bulk([
+            {
+                'user_id': sender.id,
+                'title': "Money Sent Successfully",
+                'message': f"You successfully sent ${transaction.amount:.2f} to {receiver.first_name} {receiver.last_name}",
+                'type': 'transaction',
+                'link': '/user/transactions',
+                'meta_data': {
+                    'transaction_id': transaction.transaction_id,
+                    'amount': float(transaction.amount),
+                    'fee': float(transaction.fee),
+                    'total': float(transaction.total_amount),
+                    'recipient': f"{receiver.first_name} {receiver.last_name}",
+                    'type': 'sent'
+                }
+            },
+            {
+                'user_id': receiver.id,
+                'title': "Money Received",
+                'message': f"You received ${transaction.amount:.2f} from {sender.first_name} {sender.last_name}",
+                'type': 'transaction',
+                'link': '/user/transactions',
+                'meta_data': {
+                    'transaction_id': transaction.transaction_id,
+                    'amount': float(transaction.amount),
+                    'sender': f"{sender.first_name} {sender.last_name}",
+                    'type': 'received'
+                }
             }
-        )
+        ], commit=commit)
         
         return sender_notification, receiver_notification
         
     except Exception as e:
-        print(f"Error sending transaction notifications: {str(e)}")
+        logger.exception("Error sending transaction notifications")
         return None, None
 
 
@@ -93,7 +97,7 @@ def send_deposit_notification(user, amount, status='success'):
         return notification
         
     except Exception as e:
-        print(f"Error sending deposit notification: {str(e)}")
+        logger.exception("Error sending deposit notification")
         return None
 
 
@@ -124,7 +128,7 @@ def send_low_balance_notification(user, current_balance, threshold=10.0):
             return notification
             
     except Exception as e:
-        print(f"Error sending low balance notification: {str(e)}")
+        logger.exception("Error sending low balance notification")
         return None
 
 
@@ -174,7 +178,7 @@ def send_security_notification(user, action, details=None):
         return notification
         
     except Exception as e:
-        print(f"Error sending security notification: {str(e)}")
+        logger.exception("Error sending security notification")
         return None
 
 
@@ -211,5 +215,5 @@ def send_beneficiary_notification(user, beneficiary, action='added'):
         return notification
         
     except Exception as e:
-        print(f"Error sending beneficiary notification: {str(e)}")
+        logger.exception("Error sending beneficiary notification")
         return None
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""
+Query-string parameter parsing for list endpoints
+"""
+from flask import request
+from datetime import datetime
+from utils.helpers import ValidationError
+
+_DATE_FMT = '%Y-%m-%d'
+
+# Upper bound for ?limit= on list endpoints
+MAX_LIMIT = 200
+
+
+def qp_int(name, default, lo=0, hi=None):
+    """
+    Read an integer query parameter, clamped to [lo, hi]
+
+    Args:
+        name (str): Query parameter name
+        default (int): Value when the parameter is missing or empty
+        lo (int): Smallest accepted value
+        hi (int): Largest accepted value (None for no upper bound)
+
+    Returns:
+        int: Parsed value
+
+    Raises:
+        ValidationError: If the value is not an integer
+    """
+    raw = request.args.get(name, '')
+    if raw == '':
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ValidationError(f"Invalid {name}: must be an integer")
+    value = max(value, lo)
+    if hi is not None:
+        value = min(value, hi)
+    return value
+
+
+def qp_limit(default):
+    """Read ?limit=, clamped to 1..MAX_LIMIT"""
+    return qp_int('limit', default, lo=1, hi=MAX_LIMIT)
+
+
+def qp_date(name):
+    """
+    Read a YYYY-MM-DD query parameter
+
+    Args:
+        name (str): Query parameter name
+
+    Returns:
+        datetime or None: Midnight of that day, or None if not given
+
+    Raises:
+        ValidationError: If the value is not a valid date
+    """
+    raw = request.args.get(name, '')
+    if not raw:
+        return None
+    try:
+        return datetime.strptime(raw, _DATE_FMT)
+    except ValueError:
+        raise ValidationError(f"Invalid {name}: expected YYYY-MM-DD")
@@ -78,8 +78,11 @@ def generate_transaction_receipt(transaction, sender, receiver):
     elements.append(Spacer(1, 0.3 * inch))
     
     # Add receipt info
-    receipt_date = datetime.utcnow().strftime("%B %d, %Y at %I:%M %p")
-    elements.append(Paragraph(f"Generated: {receipt_date}", styles['Right']))
+    # Time of the transaction's last change rather than of rendering, so a
+    # cached copy reads the same as a fresh one
+    status_time = transaction.updated_at or transaction.created_at
+    receipt_date = status_time.strftime("%B %d, %Y at %I:%M %p")
+    elements.append(Paragraph(f"Status as of: {receipt_date} UTC", styles['Right']))
     elements.append(Spacer(1, 0.2 * inch))
     
     # Transaction details header
@@ -243,7 +246,8 @@ def generate_wallet_statement(wallet, user, transactions, start_date=None, end_d
     Args:
         wallet: Wallet object
         user: User object
-        transactions: List of Transaction objects
+        transactions: Iterable of Transaction objects, oldest first
+            (may be a streaming query; it is read once)
         start_date: Start date for statement
         end_date: End date for statement
     
@@ -308,29 +312,30 @@ def generate_wallet_statement(wallet, user, transactions, start_date=None, end_d
     elements.append(Paragraph("Transaction History", styles['Heading2']))
     elements.append(Spacer(1, 0.1 * inch))
     
-    if transactions:
-        tx_data = [['Date', 'Type', 'Description', 'Amount', 'Balance']]
+    # Only the formatted cells are kept, so ORM rows can be streamed in
+    tx_data = [['Date', 'Type', 'Description', 'Amount', 'Balance']]
+    
+    running_balance = wallet.balance
+    for tx in transactions:
+        date = tx.created_at.strftime('%Y-%m-%d')
+        tx_type = tx.type.replace('_', ' ').title()
         
-        running_balance = wallet.balance
-        for tx in reversed(transactions):
-            date = tx.created_at.strftime('%Y-%m-%d')
-            tx_type = tx.type.replace('_', ' ').title()
-            
-            if tx.sender_id == user.id:
-                amount = f"-${tx.total_amount:.2f}"
-                description = "Transfer Out"
-            else:
-                amount = f"+${tx.amount:.2f}"
-                description = "Transfer In" if tx.type == 'transfer' else "Deposit"
-            
-            tx_data.append([
-                date,
-                tx_type,
-                description,
-                amount,
-                f"${running_balance:.2f}"
-            ])
+        if tx.sender_id == user.id:
+            amount = f"-${tx.total_amount:.2f}"
+            description = "Transfer Out"
+        else:
+            amount = f"+${tx.amount:.2f}"
+            description = "Transfer In" if tx.type == 'transfer' else "Deposit"
         
+        tx_data.append([
+            date,
+            tx_type,
+            description,
+            amount,
+            f"${running_balance:.2f}"
+        ])
+    
+    if len(tx_data) > 1:
         tx_table = Table(tx_data, colWidths=[1.2*inch, 1.2*inch, 1.5*inch, 1.2*inch, 1.2*inch])
         tx_table.setStyle(TableStyle([
             ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#dbeafe')),
@@ -1,11 +1,34 @@
 """
 Database seeding utilities
 """
-from __init__ import db
+from extensions import db
 from models import User, Wallet
 from utils.helpers import generate_unique_id
 
 
+def init_db():
+    """Create all tables and the default admin user"""
+    try:
+        if db.engine.dialect.name == 'postgresql':
+            # Needed by the trigram search indexes
+            with db.engine.begin() as conn:
+                conn.execute(db.text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+        db.create_all()
+        create_missing_indexes()
+        create_default_admin()
+        print("✅ Database tables created successfully")
+    except Exception as e:
+        print(f"❌ Database error: {str(e)}")
+        raise
+
+
+def create_missing_indexes():
+    """Create model indexes missing from tables that already existed (create_all skips them)"""
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+
 def create_default_admin():
     """Create default admin user if not exists"""
     admin = User.query.filter_by(email='admin@example.com').first()